@@ -0,0 +1,133 @@
+import json
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+from vardautomation.bitstream import BitstreamScanner, Codec, scan_bitstream
+from vardautomation.tooling.video import _ResumeManifest
+from vardautomation.vpathlib import VPath
+
+
+def _hevc_nal(nal_type: int, first_slice: bool = True) -> bytes:
+    return b'\x00\x00\x00\x01' + bytes([nal_type << 1, 1, 0x80 if first_slice else 0]) + b'\x11' * 20
+
+
+def _hevc(types: List[int]) -> Tuple[bytes, Dict[int, int]]:
+    # Pictures of two slices and a suffix SEI; parameter sets before every random access picture.
+    # Returns the bitstream and the byte offset of every access unit.
+    data, offsets = bytearray(), {}
+    for n, nal_type in enumerate(types):
+        offsets[n] = len(data)
+        if 16 <= nal_type <= 21:
+            data += _hevc_nal(32) + _hevc_nal(33) + _hevc_nal(34)
+        data += _hevc_nal(nal_type) + _hevc_nal(nal_type, False) + _hevc_nal(40)
+    return bytes(data), offsets
+
+
+def _avc_nal(nal_type: int, first_slice: bool = True) -> bytes:
+    # 3-byte start codes; first_mb_in_slice is 0 when the first bit of the slice header is set
+    return b'\x00\x00\x01' + bytes([0x60 | nal_type, 0x80 if first_slice else 0x40]) + b'\x22' * 20
+
+
+# IDR every 10 pictures
+GOP = [19 if n % 10 == 0 else 1 for n in range(45)]
+
+
+def test_scan_hevc(tmp_path: Path) -> None:
+    data, offsets = _hevc(GOP)
+    path = tmp_path / 'video.265'
+    path.write_bytes(data)
+
+    index = scan_bitstream(path)
+    assert index.codec == Codec.HEVC
+    assert index.pictures == 45
+    assert index.keyframes == [0, 10, 20, 30, 40]
+    assert index.offsets == [offsets[k] for k in index.keyframes]
+    assert index.end == len(data)
+
+
+def test_scan_avc(tmp_path: Path) -> None:
+    data = b''.join(
+        _avc_nal(9) + (_avc_nal(7) + _avc_nal(8) + _avc_nal(5) if n % 12 == 0 else _avc_nal(1)) + _avc_nal(1, False)
+        for n in range(30)
+    )
+    path = tmp_path / 'video.264'
+    path.write_bytes(data)
+
+    index = scan_bitstream(path)
+    assert index.codec == Codec.AVC
+    assert index.pictures == 30
+    assert index.keyframes == [0, 12, 24]
+    # The access unit delimiter starts the access unit
+    assert data[index.offsets[1]:index.offsets[1] + 4] == b'\x00\x00\x01\x69'
+
+
+def test_scan_leading_pictures(tmp_path: Path) -> None:
+    # CRA followed by a RASL picture, CRA followed by a trailing picture, IDR_W_RADL followed by a RADL picture,
+    # BLA followed by a trailing picture and a last CRA
+    types = [19, 1, 21, 8, 1, 21, 1, 19, 7, 1, 16, 1, 21]
+    path = tmp_path / 'video.265'
+    path.write_bytes(_hevc(types)[0])
+    assert scan_bitstream(path).keyframes == [0, 5, 10, 12]
+
+
+def test_scan_split_start_codes(tmp_path: Path) -> None:
+    data, _ = _hevc(GOP)
+    path = tmp_path / 'video.265'
+    path.write_bytes(data)
+    expected = scan_bitstream(path)
+
+    # Start codes and NAL headers split at every possible position between two reads
+    for chunk_size in (1, 2, 3, 4, 5, 7, 64):
+        assert BitstreamScanner(chunk_size=chunk_size).update(path).index(final=True) == expected
+
+    # A bitstream scanned while it is written
+    growing = tmp_path / 'growing.265'
+    growing.write_bytes(b'')
+    scanner = BitstreamScanner(chunk_size=16)
+    for pos in range(0, len(data), 997):
+        with growing.open('ab') as file:
+            file.write(data[pos:pos + 997])
+        scanner.update(growing)
+    assert scanner.index(final=True) == expected
+
+
+def test_scan_truncated(tmp_path: Path) -> None:
+    data, offsets = _hevc(GOP)
+    path = tmp_path / 'video.265'
+    # Cut in the middle of picture 25
+    path.write_bytes(data[:offsets[25] + 40])
+
+    index = BitstreamScanner().update(path).index(final=False)
+    # The last picture started may not be complete
+    assert index.pictures == 25
+    assert index.keyframes == [0, 10, 20]
+    assert index.end == offsets[25]
+
+
+def test_scan_not_a_bitstream(tmp_path: Path) -> None:
+    path = tmp_path / 'video.mkv'
+    path.write_bytes(b'\x1a\x45\xdf\xa3' + bytes(100))
+    assert scan_bitstream(path).codec is None
+
+
+def test_resume_manifest(tmp_path: Path) -> None:
+    data, offsets = _hevc(GOP)
+    part = VPath(tmp_path / 'part_000.265')
+    part.write_bytes(data[:offsets[25] + 40])
+    # Encoder interrupted
+    with pytest.raises(KeyboardInterrupt), _ResumeManifest(part, interval=60):
+        raise KeyboardInterrupt
+    manifest = json.loads(part.append_stem('_manifest').with_suffix('.json').read_text())
+    assert manifest['keyframe'] == 20 and manifest['offset'] == offsets[20] and not manifest['complete']
+    assert _ResumeManifest.last_keyframe(part) == (20, offsets[20])
+
+    # Keyframes written after the last update of the manifest
+    part.write_bytes(data[:offsets[35]])
+    assert _ResumeManifest.last_keyframe(part) == (30, offsets[30])
+
+    # A part shorter than its manifest
+    part.write_bytes(data[:offsets[15]])
+    assert _ResumeManifest.last_keyframe(part) is None
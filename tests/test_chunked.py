@@ -0,0 +1,27 @@
+from vardautomation.tooling.video import _chunk_bounds, _remap_zones
+
+
+def test_chunk_bounds_snap_to_scenes() -> None:
+    # Every boundary moves to the closest scene change of its ideal position
+    assert _chunk_bounds(1000, 4, [10, 240, 260, 490, 760, 990]) == [0, 240, 490, 760, 1000]
+    # Scene changes on the first and the last frames are never boundaries
+    assert _chunk_bounds(1000, 2, [0, 1000]) == [0, 500, 1000]
+    # Two boundaries snapping to the same scene change make a single one
+    assert _chunk_bounds(1000, 4, [480]) == [0, 480, 1000]
+
+
+def test_chunk_bounds_without_scenes() -> None:
+    assert _chunk_bounds(100, 4, []) == [0, 25, 50, 75, 100]
+    # More chunks than frames
+    assert _chunk_bounds(3, 8, []) == [0, 1, 2, 3]
+
+
+def test_remap_zones_across_chunk_edges() -> None:
+    zones = '0,50,b=3/240,300,crf=10/450,520,q=20'
+    assert _remap_zones(zones, 0, 240) == '0,50,b=3'
+    # The zone starting on the first frame of the chunk and the zone crossing its end are cut
+    assert _remap_zones(zones, 240, 500) == '0,60,crf=10/210,259,q=20'
+    assert _remap_zones(zones, 500, 1000) == '0,20,q=20'
+    # A zone crossing both edges
+    assert _remap_zones('100,900,crf=12', 240, 500) == '0,259,crf=12'
+    assert _remap_zones(zones, 600, 1000) == ''
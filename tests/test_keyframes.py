@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from vardautomation.tooling.misc import read_keyframes
+
+
+def _vint(value: int) -> bytes:
+    length = next(n for n in range(1, 9) if value < (1 << 7 * n) - 1)
+    return ((1 << 7 * length) | value).to_bytes(length, 'big')
+
+
+def _el(eid: int, data: bytes, unknown: bool = False) -> bytes:
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown else _vint(len(data))
+    return eid.to_bytes((eid.bit_length() + 7) // 8, 'big') + size + data
+
+
+def _uint(eid: int, value: int) -> bytes:
+    return _el(eid, value.to_bytes(max(1, (value.bit_length() + 7) // 8), 'big'))
+
+
+def _simple_block(track: int, timestamp: int, key: bool) -> bytes:
+    return _el(0xA3, _vint(track) + timestamp.to_bytes(2, 'big', signed=True) + bytes([0x80 if key else 0]) + bytes(16))
+
+
+def _block_group(track: int, timestamp: int, reference: bool) -> bytes:
+    block = _el(0xA1, _vint(track) + timestamp.to_bytes(2, 'big', signed=True) + b'\x00' + bytes(16))
+    return _el(0xA0, block + (_uint(0xFB, 1) if reference else b''))
+
+
+def _mkv(frames: List[Tuple[int, bool]], cluster_size: int = 6) -> bytes:
+    # Video track 1 after an audio track 2 whose blocks are all keyframes.
+    # Odd frames are SimpleBlocks and even frames are BlockGroups.
+    tracks = _el(0x1654AE6B, _el(0xAE, _uint(0xD7, 2) + _uint(0x83, 2)) + _el(0xAE, _uint(0xD7, 1) + _uint(0x83, 1)))
+    clusters = b''
+    for c in range(0, len(frames), cluster_size):
+        body = _uint(0xE7, c * 40)
+        for n, key in frames[c:c + cluster_size]:
+            body += _simple_block(1, (n - c) * 40, key) if n % 2 else _block_group(1, (n - c) * 40, not key)
+            body += _simple_block(2, 0, True)
+        # Live muxers write clusters of unknown size
+        clusters += _el(0x1F43B675, body, unknown=c // cluster_size == 1)
+    return _el(0x1A45DFA3, _uint(0x4282, 1)) + _el(0x18538067, _el(0xEC, bytes(10)) + tracks + clusters, unknown=True)
+
+
+def _decoding_order(num_frames: int, keyframes: List[int]) -> List[Tuple[int, bool]]:
+    # IPBB... groups of three pictures: the P picture is decoded before the two B pictures it follows
+    order = list[int]()
+    for g in range(0, num_frames, 3):
+        order += [g, g + 2, g + 1] if g in keyframes else [g + 2, g, g + 1]
+    return [(n, n in keyframes) for n in order]
+
+
+def test_mkv_keyframes(tmp_path: Path) -> None:
+    path = tmp_path / 'video.mkv'
+    path.write_bytes(_mkv(_decoding_order(36, [0, 9, 18, 27])))
+    assert read_keyframes(path) == [0, 9, 18, 27]
+
+
+def test_mkv_keyframes_truncated(tmp_path: Path) -> None:
+    path = tmp_path / 'video.mkv'
+    data = _mkv(_decoding_order(36, [0, 9, 18, 27]))
+    path.write_bytes(data[:len(data) - 100])
+    assert read_keyframes(path) == [0, 9, 18, 27]
+
+
+def test_mkv_keyframes_no_video(tmp_path: Path) -> None:
+    path = tmp_path / 'audio.mka'
+    path.write_bytes(_el(0x1A45DFA3, _uint(0x4282, 1)) + _el(0x18538067, _el(0x1654AE6B, _el(0xAE, _uint(0xD7, 1) + _uint(0x83, 2)))))
+    with pytest.raises(ValueError):
+        read_keyframes(path)
+
+
+def _hevc_nal(nal_type: int, first_slice: bool = True) -> bytes:
+    return b'\x00\x00\x00\x01' + bytes([nal_type << 1, 1, 0x80 if first_slice else 0]) + b'\x11' * 20
+
+
+def _hevc_picture(nal_type: int) -> bytes:
+    # Two slices and a suffix SEI
+    return _hevc_nal(nal_type) + _hevc_nal(nal_type, False) + _hevc_nal(40)
+
+
+def test_raw_hevc_keyframes(tmp_path: Path) -> None:
+    # Pictures in decoding order: IDR, 3 TRAIL, CRA followed by a RASL picture, TRAIL, CRA without leading pictures,
+    # TRAIL and a last CRA
+    types = [19, 1, 1, 1, 21, 8, 1, 21, 1, 21]
+    path = tmp_path / 'video.265'
+    path.write_bytes(_hevc_nal(32) + _hevc_nal(33) + _hevc_nal(34) + b''.join(_hevc_picture(t) for t in types))
+    assert read_keyframes(path) == [0, 7, 9]
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+from pathlib import Path
+
+from vardautomation.tooling.spool import Spool, SpoolJob
+
+SCRIPT = '''
+import vapoursynth as vs
+vs.core.std.BlankClip(width=64, height=36, format=vs.YUV420P8, length=60).set_output()
+'''
+# Copy of the y4m stream written by the worker, standing in for an encoder
+ENCODER = [sys.executable, '-c', 'import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[1], "wb"))']
+
+
+def _job(spool: Spool, script: Path, job_id: str, start: int, end: int) -> SpoolJob:
+    part = (spool.parts / f'{job_id}.y4m').to_str()
+    return SpoolJob(job_id, str(script), 0, 60, start, end, [*ENCODER, part], True, part)
+
+
+def test_spool_two_workers(tmp_path: Path) -> None:
+    script = tmp_path / 'script.vpy'
+    script.write_text(SCRIPT, encoding='utf-8')
+    spool = Spool(tmp_path / 'spool')
+    jobs = [_job(spool, script, f'chunk{i}', i * 10, i * 10 + 10) for i in range(6)]
+    for job in jobs:
+        spool.submit(job)
+
+    workers = [
+        subprocess.Popen([
+            sys.executable, '-m', 'vardautomation.tooling.spool', spool.path.to_str(),
+            '--poll-interval', '0.05', '--idle-timeout', '1'
+        ])
+        for _ in range(2)
+    ]
+    try:
+        done: list[str] = []
+        spool.wait(jobs, poll_interval=0.05, stale_timeout=60, on_done=lambda job: done.append(job.id))
+    finally:
+        for worker in workers:
+            worker.wait(30)
+
+    assert sorted(done) == [job.id for job in jobs]
+    assert [worker.returncode for worker in workers] == [0, 0]
+    # One part per job and no temporary file left behind
+    assert sorted(p.name for p in spool.parts.iterdir()) == [f'{job.id}.y4m' for job in jobs]
+    sizes = {p.stat().st_size for p in spool.parts.iterdir()}
+    assert len(sizes) == 1 and sizes.pop() > 10 * 64 * 36 * 3 // 2
+
+
+def test_spool_claim_is_fresh(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    job = _job(spool, tmp_path / 'script.vpy', 'old', 0, 10)
+    spool.submit(job)
+    os.utime(spool.path / 'jobs' / 'old.json', (0, 0))
+
+    assert spool.claim() == job
+    assert spool.requeue_stale(60) == []
+    assert spool.state('old') == 'claimed'
+
+
+def test_spool_requeued_under_the_worker(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    first, second = (_job(spool, tmp_path / 'script.vpy', job_id, 0, 10) for job_id in ('first', 'second'))
+    spool.submit(first)
+    spool.submit(second)
+    assert spool.claim() == first
+    assert spool.claim() == second
+    assert sorted(spool.requeue_stale(-1)) == ['first', 'second']
+
+    # A job done by its first worker is taken back from the queue
+    assert spool.complete(first)
+    assert spool.state('first') == 'done'
+
+    # A failed worker leaves the job to the next worker
+    assert not spool.fail(second, 'error')
+    assert spool.state('second') == 'jobs'
+    assert spool.error('second') == ''
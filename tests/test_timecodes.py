@@ -0,0 +1,101 @@
+import io
+
+from fractions import Fraction
+from typing import List, Sequence, Tuple
+
+import pytest
+
+from vardautomation.timecodes import Timecodes
+
+# Ranges of (number of frames, frame rate)
+CFR = [(5000, Fraction(24000, 1001))]
+VFR = [
+    (300, Fraction(24000, 1001)), (200, Fraction(30000, 1001)), (151, Fraction(60000, 1001)),
+    (97, Fraction(24000, 1001)), (40, Fraction(24000, 1001)), (1000, Fraction(25))
+]
+
+
+def _timecodes(ranges: Sequence[Tuple[int, Fraction]]) -> Timecodes:
+    tcs = Timecodes()
+    for num_frames, fps in ranges:
+        tcs.extend_cfr(num_frames, fps)
+    return tcs
+
+
+def _old_v2(ranges: Sequence[Tuple[int, Fraction]]) -> List[int]:
+    # Previous writer: float accumulation of the durations, end time of every frame
+    tc, stamps = 0.0, list[int]()
+    for num_frames, fps in ranges:
+        for _ in range(num_frames):
+            tc += fps.denominator / fps.numerator
+            stamps.append(round(tc * 1000))
+    return stamps
+
+
+def _old_v1(ranges: Sequence[Tuple[int, Fraction]], precision: int = 6) -> Tuple[float, List[Tuple[int, int, float]]]:
+    # Previous make_tcfile: one line per clip
+    num_frames = [n for n, _ in ranges]
+    seconds = sum(n * fps.denominator / fps.numerator for n, fps in ranges)
+    lines, start = list[Tuple[int, int, float]](), 0
+    for n, fps in ranges:
+        lines.append((start, start + n - 1, round(float(fps), precision)))
+        start += n
+    return round(sum(num_frames) / seconds, precision), lines
+
+
+def _read_v2(text: str) -> List[int]:
+    lines = text.splitlines()
+    assert lines[0] == '# timestamp format v2'
+    return [int(line) for line in lines[1:]]
+
+
+def _read_v1(text: str) -> Tuple[float, List[float]]:
+    # Frame rate of every frame
+    lines = text.splitlines()
+    assert lines[0] == '# timestamp format v1'
+    assume = float(lines[1].split()[1])
+    fpss = list[float]()
+    for line in lines[2:]:
+        start, end, fps = line.split(',')
+        assert int(start) == len(fpss)
+        fpss.extend([float(fps)] * (int(end) - int(start) + 1))
+    return assume, fpss
+
+
+@pytest.mark.parametrize('ranges', [CFR, VFR], ids=['cfr', 'vfr'])
+def test_v2_round_trip(ranges: Sequence[Tuple[int, Fraction]]) -> None:
+    out = io.StringIO()
+    _timecodes(ranges).write_v2(out)
+    stamps = _read_v2(out.getvalue())
+
+    # Start time of every frame, the previous writer wrote the end times
+    old = _old_v2(ranges)
+    assert len(stamps) == len(old) and stamps[0] == 0
+    assert all(abs(a - b) <= 1 for a, b in zip(stamps[1:], old))
+
+    # Exact times rounded to the nearest millisecond
+    exact, t = list[int](), Fraction(0)
+    for num_frames, fps in ranges:
+        for _ in range(num_frames):
+            exact.append(int(t * 1000 + Fraction(1, 2)))
+            t += 1 / fps
+    assert stamps == exact
+
+
+@pytest.mark.parametrize('ranges', [CFR, VFR], ids=['cfr', 'vfr'])
+def test_v1_round_trip(ranges: Sequence[Tuple[int, Fraction]]) -> None:
+    out = io.StringIO()
+    _timecodes(ranges).write_v1(out)
+    assume, fpss = _read_v1(out.getvalue())
+
+    old_assume, old_lines = _old_v1(ranges)
+    assert assume == old_assume
+    assert fpss == [fps for start, end, fps in old_lines for _ in range(start, end + 1)]
+    # Adjacent ranges of the same frame rate are merged
+    assert out.getvalue().count('\n') == 2 + sum(1 for i, (_, fps) in enumerate(ranges) if not i or ranges[i - 1][1] != fps)
+
+
+def test_seconds_drift() -> None:
+    tcs = _timecodes([(10 ** 6, Fraction(24000, 1001))])
+    assert tcs.seconds()[-1] == 10 ** 6 * 1001 / 24000
+    assert int(tcs.timestamps()[-1]) == round(Fraction(10 ** 9 * 1001, 24000))
@@ -4,19 +4,22 @@ from ._logging import *
 from ._metadata import __author__, __version__, version  # type: ignore[pylance]
 from .automation import *
 from .binary_path import *
+from .bitstream import *
 from .chapterisation import *
 from .comp import *
 from .config import *
 from .language import *
+from .progress import *
 from .render import *
+from .timecodes import *
 from .tooling import *
 from .vpathlib import *
 from .vtypes import *
 
 # for wildcard imports
 _mods = [
-    'automation', 'binary_path', 'chapterisation', 'comp', 'config', 'language',
-    'render', 'tooling', 'vtypes', 'vpathlib'
+    'automation', 'binary_path', 'bitstream', 'chapterisation', 'comp', 'config', 'language',
+    'progress', 'render', 'timecodes', 'tooling', 'vtypes', 'vpathlib'
 ]
 
 __all__ = []
@@ -6,13 +6,15 @@ __all__ = [
     'patch', 'Patch'
 ]
 
+import inspect
+
 from bisect import bisect_left
 from copy import deepcopy
 from dataclasses import dataclass
 from enum import Enum, auto
 from functools import partial
 from itertools import chain
-from typing import Callable, List, Optional, Protocol, Sequence, Tuple, TypedDict, cast
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple, TypedDict, cast
 
 import vapoursynth as vs
 
@@ -23,9 +25,11 @@ from vstools import FrameRangeN, FrameRangesN
 from ._logging import logger
 from .binary_path import BinaryPath
 from .config import FileInfo, FileInfo2
+from .render import SceneChangeMode as SCM
+from .render import SceneChangeSink, tee_render
 from .tooling import (
-    AudioCutter, AudioEncoder, AudioExtracter, BasicTool, LosslessEncoder, MatroskaFile, Qpfile,
-    Track, VideoEncoder, get_keyframes, make_qpfile
+    AudioCutter, AudioEncoder, AudioExtracter, BasicTool, EncoderSink, LosslessEncoder, MatroskaFile,
+    Qpfile, Track, VideoEncoder, make_qpfile, read_keyframes, write_qpfile
 )
 from .tooling.video import SupportManualVFR, SupportQpfile, SupportResume
 from .vpathlib import CleanupSet, VPath
@@ -76,6 +80,43 @@ class _PLPFunction(Protocol):
         ...
 
 
+_MAKE_QPFILE_MODE: int = inspect.signature(make_qpfile).parameters['mode'].default
+_MAKE_QPFILE_SOURCE_GAP: int = inspect.signature(make_qpfile).parameters['source_gap'].default
+
+
+def _qpfile_detection(qpfile_func: Callable[[vs.VideoNode, AnyPath], Qpfile]) -> Optional[Dict[str, Any]]:
+    # Arguments of a make_qpfile, bare or through functools.partial, that a SceneChangeSink can stand in for
+    kwargs: Dict[str, Any] = {}
+    if isinstance(qpfile_func, partial) and not qpfile_func.args:
+        kwargs = dict(qpfile_func.keywords)
+        qpfile_func = qpfile_func.func
+    if qpfile_func is not make_qpfile:
+        return None
+    # Segments, checkpoints and the like have no counterpart in a SceneChangeSink
+    if not kwargs.keys() <= {'mode', 'proxy', 'cache', 'source', 'source_gap'}:
+        return None
+    mode, proxy = int(kwargs.get('mode', _MAKE_QPFILE_MODE)), kwargs.get('proxy')
+    if mode & SCM.SOURCE == SCM.SOURCE or (proxy and proxy.half_rate):
+        return None
+    if kwargs.get('cache') and not kwargs.get('source'):
+        return None
+    return kwargs
+
+
+def _qpfile_writer(frames: List[int], num_frames: int,
+                   detection: Dict[str, Any]) -> Callable[[vs.VideoNode, AnyPath], Qpfile]:
+    # Qpfile function writing the scene changes detected in a clip of num_frames frames.
+    # A shorter clip is its end, as sliced by SupportResume.
+    def _write(clip: vs.VideoNode, path: AnyPath) -> Qpfile:
+        if clip.num_frames == num_frames:
+            return write_qpfile(path, frames)
+        if clip.num_frames < num_frames:
+            offset = num_frames - clip.num_frames
+            return write_qpfile(path, [f - offset for f in frames if f >= offset])
+        return make_qpfile(clip, path, **detection)
+    return _write
+
+
 def _lossless_index(path: VPath) -> vs.VideoNode:
     return core.lsmas.LWLibavSource(path.to_str())
 
@@ -193,6 +234,7 @@ class SelfRunner:
         if self.config.clear_outputs:
             vs.clear_outputs()
 
+        qpfile_params = self._qpfile_params
         if self.config.v_lossless_encoder:
             if isinstance(self.clip, Sequence):
                 raise NotImplementedError(f'{self.__class__.__name__}: Multiple clips for lossless encode isn\'t implemented')
@@ -200,22 +242,59 @@ class SelfRunner:
                 path_lossless
                 := self.file.name_clip_output.append_stem(self.config.v_lossless_encoder.suffix_name)
             ).exists():
-                self.config.v_lossless_encoder.run_enc(self.clip, self.file)
+                qpfile_params = self._encode_lossless(self.clip, self.config.v_lossless_encoder)
             self.clip = self.plp_function(path_lossless)
 
         if not self.file.name_clip_output.exists():
             if isinstance(self.clip, vs.VideoNode):
                 if isinstance(self.config.v_encoder, SupportQpfile):
-                    self.config.v_encoder.run_enc(self.clip, self.file, **self._qpfile_params)
+                    self.config.v_encoder.run_enc(self.clip, self.file, **qpfile_params)
                 else:
                     self.config.v_encoder.run_enc(self.clip, self.file)
             elif isinstance(self.config.v_encoder, SupportManualVFR):
-                self.config.v_encoder.run_enc(self.clip, self.file, **self._qpfile_params)
+                self.config.v_encoder.run_enc(self.clip, self.file, **qpfile_params)
                 self.work_files.add(self.config.v_encoder.tcfile)
             else:
                 raise TypeError(f'{self.__class__.__name__}: Wrong video encoder and/or type of clip')
         self.work_files.add(self.file.name_clip_output)
 
+    def _encode_lossless(self, clip: vs.VideoNode, encoder: LosslessEncoder) -> _QpFileParams:
+        qpfile_clip = self._qpfile_params.get('qpfile_clip')
+        detection = _qpfile_detection(self._qpfile_params.get('qpfile_func', make_qpfile))
+        if not qpfile_clip or detection is None or not isinstance(self.config.v_encoder, SupportQpfile):
+            encoder.run_enc(clip, self.file)
+            return self._qpfile_params
+
+        mode, proxy, cache = detection.get('mode', _MAKE_QPFILE_MODE), detection.get('proxy'), detection.get('cache')
+        key: Optional[Dict[str, Any]] = None
+        frames: Optional[List[int]] = None
+        if cache:
+            key = cache.make_key(
+                detection['source'], mode, qpfile_clip.num_frames, proxy=proxy,
+                source_gap=detection.get('source_gap', _MAKE_QPFILE_SOURCE_GAP)
+            )
+            frames = cache.get(key)
+
+        if frames is None:
+            # Detect the scene changes of the qpfile clip during the lossless pass
+            # instead of rendering it again for make_qpfile
+            scenes = SceneChangeSink(mode, proxy=proxy)
+            tee_render(
+                scenes.attach(clip, qpfile_clip), [EncoderSink(encoder, self.file), scenes],
+                progress='Encoding lossless and detecting scene changes...',
+                prefetch=encoder.prefetch, backlog=encoder.backlog
+            )
+            frames = scenes.frames
+            if cache and key:
+                cache.put(key, frames)
+        else:
+            logger.info(f'{self.__class__.__name__}: reusing cached scene changes')
+            encoder.run_enc(clip, self.file)
+
+        return _QpFileParams(
+            qpfile_clip=qpfile_clip, qpfile_func=_qpfile_writer(frames, qpfile_clip.num_frames, detection)
+        )
+
     def _audio_getter(self) -> None:  # noqa C901
         if not isinstance(self.file, FileInfo2):
             if self.config.a_extracters and self.file.a_src:
@@ -290,8 +369,7 @@ def patch(
     workdir.mkdir()
 
     # _resolve_range
-    kf = get_keyframes(_file_to_fix)
-    kfsint = kf.frames + [clip.num_frames]
+    kfsint = read_keyframes(_file_to_fix) + [clip.num_frames]
 
     nbranges = _bound_to_keyframes(nranges, kfsint)
     logger.debug(f'Ranges: {str(nranges)}')
@@ -0,0 +1,171 @@
+"""Raw H.264/H.265 (Annex B) bitstream helpers"""
+
+__all__ = ['Codec', 'BitstreamIndex', 'BitstreamScanner', 'scan_bitstream']
+
+from enum import Enum
+from typing import List, NamedTuple, Optional, Tuple
+
+from .vpathlib import VPath
+from .vtypes import AnyPath
+
+_START_CODE = b'\x00\x00\x01'
+# Start code and the longest NAL header we look at
+_HEADER_SIZE = 6
+
+
+class Codec(str, Enum):
+    """Codec of a raw bitstream"""
+
+    AVC = 'avc'
+    """H.264"""
+
+    HEVC = 'hevc'
+    """H.265"""
+
+
+class BitstreamIndex(NamedTuple):
+    """Pictures and keyframes found in a bitstream. Pictures are counted in decoding order"""
+
+    codec: Optional[Codec]
+    """Codec of the bitstream, None if it isn't a raw AVC/HEVC bitstream"""
+
+    pictures: int
+    """Number of complete pictures"""
+
+    keyframes: List[int]
+    """
+    Pictures where a new bitstream can start without losing any picture:
+    IDR pictures and other random access pictures without leading pictures
+    """
+
+    offsets: List[int]
+    """Byte offsets of the access units of the keyframes"""
+
+    end: int
+    """Byte offset of the end of the last complete picture"""
+
+
+class BitstreamScanner:
+    """
+    Incremental parser of the NAL unit headers of an Annex B bitstream.
+
+    Only the headers are parsed so a scan runs at disk speed.
+    The bitstream can still be written while it is scanned; :py:func:`update` reads what was appended since the last call.
+    """
+
+    def __init__(self, codec: Optional[Codec] = None, offset: int = 0, chunk_size: int = 1 << 24) -> None:
+        """
+        :param codec:           Codec of the bitstream, detected from its first NAL unit if None
+        :param offset:          Byte offset of an access unit where the scan starts.
+                                Picture numbers are relative to it.
+        :param chunk_size:      Number of bytes read at once
+        """
+        self.chunk_size = chunk_size
+        self.codec = codec
+        self.scanned = offset
+        self._tail = b''
+        self._started = 0
+        self._keyframes: List[Tuple[int, int]] = []
+        # Random access picture waiting for the next picture to know if it has leading pictures
+        self._candidate: Optional[Tuple[int, int]] = None
+        self._au_start: Optional[int] = None
+        self._last_au = offset
+        self._invalid = False
+
+    def update(self, path: AnyPath) -> 'BitstreamScanner':
+        """
+        Parse the bytes appended to the file since the last update
+
+        :param path:            Path of the bitstream
+        :return:                This scanner
+        """
+        with VPath(path).open('rb') as file:
+            file.seek(self.scanned)
+            while not self._invalid and (data := file.read(self.chunk_size)):
+                self._feed(data)
+        return self
+
+    def index(self, final: bool = False) -> BitstreamIndex:
+        """
+        :param final:           The bitstream is complete, so the last picture is complete too
+        :return:                Index of what was parsed
+        """
+        if self._invalid:
+            return BitstreamIndex(None, 0, [], [], 0)
+        keyframes = list(self._keyframes)
+        if final and self._candidate:
+            keyframes.append(self._candidate)
+        pictures = self._started if final else max(self._started - 1, 0)
+        end = self.scanned if final else self._last_au
+        return BitstreamIndex(self.codec, pictures, [k for k, _ in keyframes], [o for _, o in keyframes], end)
+
+    def _feed(self, data: bytes) -> None:
+        buf = self._tail + data
+        base = self.scanned - len(self._tail)
+        find = buf.find
+        i = 0
+        while (j := find(_START_CODE, i)) >= 0 and j + _HEADER_SIZE <= len(buf):
+            offset = base + j - (1 if j and buf[j - 1] == 0 else 0)
+            self._nal(buf[j + 3:j + _HEADER_SIZE], offset)
+            if self._invalid:
+                return
+            i = j + 3
+        # Keep what may be the beginning of the next start code and header, with a leading zero byte
+        self._tail = buf[max(j - 1, i):] if j >= 0 else buf[max(i, len(buf) - _HEADER_SIZE):]
+        self.scanned = base + len(buf)
+
+    def _nal(self, header: bytes, offset: int) -> None:
+        if self.codec is None:
+            self.codec = _detect_codec(header[0])
+            if self.codec is None:
+                self._invalid = True
+                return
+
+        if self.codec == Codec.HEVC:
+            nal_type = (header[0] >> 1) & 0x3F
+            vcl = nal_type < 32
+            first_slice = bool(header[2] & 0x80)
+            leading = 6 <= nal_type <= 9
+            random_access = 16 <= nal_type <= 21
+            starts_au = nal_type in (32, 33, 34, 35, 39) or 41 <= nal_type <= 44 or 48 <= nal_type <= 55
+        else:
+            nal_type = header[0] & 0x1F
+            vcl = 1 <= nal_type <= 5
+            # first_mb_in_slice == 0
+            first_slice = bool(header[1] & 0x80)
+            leading = False
+            random_access = nal_type == 5
+            starts_au = nal_type in (6, 7, 8, 9) or 14 <= nal_type <= 18
+
+        if not vcl:
+            if starts_au and self._au_start is None:
+                self._au_start = offset
+            return
+
+        if first_slice:
+            start = offset if self._au_start is None else self._au_start
+            if self._candidate and not leading:
+                self._keyframes.append(self._candidate)
+            self._candidate = (self._started, start) if random_access else None
+            self._started += 1
+            self._last_au = start
+        self._au_start = None
+
+
+def _detect_codec(byte: int) -> Optional[Codec]:
+    # A bitstream starts with an access unit delimiter or parameter sets
+    if byte & 0x81 == 0 and (byte >> 1) & 0x3F in (32, 33, 35, 39):
+        return Codec.HEVC
+    if byte & 0x80 == 0 and byte & 0x1F in (6, 7, 9):
+        return Codec.AVC
+    return None
+
+
+def scan_bitstream(path: AnyPath) -> BitstreamIndex:
+    """
+    Index a complete raw H.264/H.265 bitstream
+
+    :param path:            Path of the bitstream
+    :return:                Index of the bitstream
+    """
+    return BitstreamScanner().update(path).index(final=True)
@@ -17,7 +17,6 @@ import random
 import subprocess
 
 from enum import Enum, auto
-from functools import partial
 from typing import Any, Callable, Dict, Final, Iterable, List, NamedTuple, Optional, Set
 
 import numpy as np
@@ -30,8 +29,9 @@ from vstools import DitherType
 
 from ._logging import logger
 from .binary_path import BinaryPath
+from .progress import ThrottledUpdateFunc
+from .render import extract_props
 from .tooling import SubProcessAsync, VideoEncoder
-from .utils import Properties
 from .vpathlib import VPath
 from .vtypes import AnyPath
 
@@ -291,51 +291,38 @@ class Comparison:
 
     @logger.catch
     def _select_samples_ptypes(self, num_frames: int, k: int, picture_types: PictureType | List[PictureType]) -> Set[int]:
-        from vardefunc.util import select_frames
-        samples: Set[int] = set()
-        _max_attempts = 0
-        _rnum_checked: Set[int] = set()
         picture_types = picture_types if isinstance(picture_types, list) else [picture_types]
+        wanted = np.array([pt.value for pt in picture_types], np.bytes_)
+        max_attempts = _MAX_ATTEMPTS_PER_PICTURE_TYPE * k
+
+        # Random frames are checked by batches, reading the _PictType of every clip in one pass
+        candidates = random.sample(range(num_frames), min(num_frames, max_attempts))
+        samples: List[int] = []
+        checked = 0
         while len(samples) < k:
-            _attempts = 0
-
-            while True:
-                # Check if we don't exceed the length of the clips
-                # if yes then that means we checked all the frames
-                if len(_rnum_checked) >= num_frames:
-                    raise ValueError(f'{self.__class__.__name__}: There are not enough of {picture_types} in these clips')
-                rnum = _rand_num_frames(_rnum_checked, partial(random.randrange, start=0, stop=num_frames))
-                _rnum_checked.add(rnum)
-
-                # Check _PictType
-                if all(
-                    Properties.get_prop(f, '_PictType', bytes) in picture_types
-                    for f in vs.core.std.Splice([select_frames(c, [rnum]) for c in self.clips.values()], mismatch=True).frames()
-                ):
-                    break
-                _attempts += 1
-                _max_attempts += 1
-
-                if _attempts > _MAX_ATTEMPTS_PER_PICTURE_TYPE:
-                    logger.warning(
-                        f'{self.__class__.__name__}: {_MAX_ATTEMPTS_PER_PICTURE_TYPE} attempts were made for sample {len(samples)} '
-                        f'and no match found for {picture_types}; stopping iteration...'
-                    )
-                    break
-
-            if _max_attempts > (curr_max_att := _MAX_ATTEMPTS_PER_PICTURE_TYPE * k):
-                raise RecursionError(f'{self.__class__.__name__}: attempts max of {curr_max_att} has been reached!')
-
-            if _attempts < _MAX_ATTEMPTS_PER_PICTURE_TYPE:
-                samples.add(rnum)
-                logger.info(
-                    "\rSelecting image: %i/%i ~ %.2f %%" % (
-                        len(samples), k, 100 * len(samples) / k
-                    )
+            # Check if we don't exceed the length of the clips
+            # if yes then that means we checked all the frames
+            if checked >= num_frames:
+                raise ValueError(f'{self.__class__.__name__}: There are not enough of {picture_types} in these clips')
+            if checked >= max_attempts:
+                raise RecursionError(f'{self.__class__.__name__}: attempts max of {max_attempts} has been reached!')
+
+            batch = candidates[checked:checked + 2 * (k - len(samples))]
+            checked += len(batch)
+            matches = np.ones(len(batch), np.bool_)
+            for clip in self.clips.values():
+                ptypes = extract_props(clip, ['_PictType'], batch, dtypes={'_PictType': np.bytes_})['_PictType']
+                matches &= np.isin(ptypes, wanted)
+            samples.extend(np.asarray(batch)[matches][:k - len(samples)].tolist())
+
+            logger.info(
+                "\rSelecting image: %i/%i ~ %.2f %%" % (
+                    len(samples), k, 100 * len(samples) / k
                 )
+            )
 
         logger.logger.opt(raw=True).info('\n')
-        return samples
+        return set(samples)
 
 
 def make_comps(
@@ -370,13 +357,6 @@ def make_comps(
         comp.upload_to_slowpics(slowpics_conf)
 
 
-def _rand_num_frames(checked: Set[int], rand_func: Callable[[], int]) -> int:
-    rnum = rand_func()
-    while rnum in checked:
-        rnum = rand_func()
-    return rnum
-
-
 @logger.catch
 def _saver(writer: Writer, compression: int) -> Callable[[int, vs.VideoFrame, List[VPath]], vs.VideoFrame]:  # noqa: C901
     if writer == Writer.OPENCV:
@@ -484,11 +464,7 @@ def _make_api_compatible(config: SlowPicsConf) -> Dict[str, str]:
     return conf
 
 
-def _progress_update_func(value: int, endvalue: int) -> None:
-    if value == 0:
-        return
-    logger.logger.opt(raw=True, colors=True).info(
-        logger.info.colour
-        + "\rExtracting image: %i/%i ~ %.2f %%" % (value, endvalue, 100 * value / endvalue)
-        + logger.info.colour_close
-    )
+_progress_update_func = ThrottledUpdateFunc(
+    logger.info.colour + "\rExtracting image: %i/%i ~ %.2f %%" + logger.info.colour_close,
+    "Extracting image", colors=True
+)
@@ -16,6 +16,7 @@ __all__ = [
 
 import sys
 
+from contextlib import ExitStack
 from dataclasses import dataclass
 from enum import IntEnum
 from fractions import Fraction
@@ -29,7 +30,7 @@ from pymediainfo import MediaInfo
 from ._logging import logger
 from .chapterisation import MatroskaXMLChapters, MplsReader
 from .language import UNDEFINED, Lang
-from .render import audio_async_render
+from .render import audio_async_render, audios_async_render
 from .vpathlib import VPath
 from .vtypes import AnyPath, DuplicateFrame, Trim, VPSIdx
 
@@ -499,6 +500,38 @@ class FileInfo2(FileInfo):
                 progress=f'Writing a_src_cut to {self.a_src_cut.set_track(index).resolve().to_str()}'
             )
 
+    @logger.catch
+    def write_a_src_all(self) -> None:
+        """
+        Using `audios_async_render` write all the AudioNodes of the file
+        in a single pass as WAV files to `a_src` path.
+        Tracks are numbered from 1.
+        """
+        if not self.a_src:
+            raise ValueError(f'{self.__class__.__name__}: no a_src VPath found!')
+        self._write_audios(self.audios, self.a_src, 'a_src')
+
+    @logger.catch
+    def write_a_src_cut_all(self) -> None:
+        """
+        Using `audios_async_render` write all the trimmed AudioNodes of the file
+        in a single pass as WAV files to `a_src_cut` path.
+        Tracks are numbered from 1.
+        """
+        if not self.a_src_cut:
+            raise ValueError(f'{self.__class__.__name__}: no a_src_cut VPath found!')
+        self._write_audios(self.audios_cut, self.a_src_cut, 'a_src_cut')
+
+    @staticmethod
+    def _write_audios(audios: Sequence[vs.AudioNode], path: VPath, name: str) -> None:
+        paths = [path.set_track(i) for i in range(1, len(audios) + 1)]
+        with ExitStack() as stack:
+            binaries = [stack.enter_context(p.open('wb')) for p in paths]
+            audios_async_render(
+                audios, binaries,
+                progress=[f'Writing {name} to {p.resolve().to_str()}' for p in paths]
+            )
+
 
 class _File(NamedTuple):
     file: VPath
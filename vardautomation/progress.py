@@ -0,0 +1,189 @@
+"""Progress reporting module"""
+
+__all__ = ['ProgressMode', 'RenderProgress', 'ThrottledUpdateFunc']
+
+import json
+import sys
+import threading
+import time
+
+from enum import IntEnum
+from typing import ClassVar, List, Optional, TextIO
+
+from rich.progress import BarColumn, Progress, ProgressColumn, Task, TaskID, TextColumn, TimeRemainingColumn
+from rich.text import Text
+
+from ._logging import logger
+
+
+class ProgressMode(IntEnum):
+    """How progress is displayed"""
+
+    AUTO = 0
+    """``RICH`` if stderr is a terminal, ``LINES`` otherwise"""
+
+    RICH = 1
+    """Progress bars"""
+
+    LINES = 2
+    """One JSON object per line on stderr, for logs and wrapper scripts"""
+
+
+def _resolve_mode(mode: ProgressMode) -> ProgressMode:
+    if mode == ProgressMode.AUTO:
+        return ProgressMode.RICH if sys.stderr.isatty() else ProgressMode.LINES
+    return mode
+
+
+def _write_line(file: TextIO, description: str, completed: int, total: int, elapsed: float) -> None:
+    file.write(json.dumps(dict(
+        progress=description, completed=completed, total=total,
+        fps=round(completed / elapsed, 2) if elapsed > 0 else 0.0, elapsed=round(elapsed, 3)
+    )) + '\n')
+    file.flush()
+
+
+class FPSColumn(ProgressColumn):
+    def render(self, task: Task) -> Text:
+        return Text(f"{task.speed or 0:.02f} fps")
+
+
+class _ProgressTask:
+    __slots__ = ('description', 'total', 'completed', 'reported', 'rich_id')
+
+    def __init__(self, description: str, total: int, rich_id: Optional[TaskID]) -> None:
+        self.description = description
+        self.total = total
+        self.completed = 0
+        self.reported = 0
+        self.rich_id = rich_id
+
+
+class RenderProgress:
+    """
+    Progress display shared by the render, encode and extraction functions.
+
+    Updates are counted on every call but only displayed every ``1 / rate`` seconds
+    and when a task completes, so reporting stays cheap at high frame rates.
+    Tasks can be added and updated from several threads.
+    """
+
+    mode: ClassVar[ProgressMode] = ProgressMode.RICH
+    """Default display mode"""
+
+    rate: ClassVar[float] = 10.0
+    """Default number of refreshes per second. ``0`` refreshes on every update"""
+
+    def __init__(self, mode: Optional[ProgressMode] = None, rate: Optional[float] = None, file: Optional[TextIO] = None) -> None:
+        """
+        :param mode:        Display mode, defaults to :py:attr:`RenderProgress.mode`
+        :param rate:        Number of refreshes per second, defaults to :py:attr:`RenderProgress.rate`
+        :param file:        Output of ``ProgressMode.LINES``, defaults to stderr
+        """
+        self._mode = _resolve_mode(self.mode if mode is None else mode)
+        rate = self.rate if rate is None else rate
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._file = file
+        self._tasks: List[_ProgressTask] = []
+        self._start = self._next = time.monotonic()
+        self._rich: Optional[Progress] = None
+        self._lock = threading.Lock()
+        if self._mode == ProgressMode.RICH:
+            self._rich = Progress(
+                TextColumn("{task.description}"),
+                BarColumn(),
+                TextColumn("{task.completed}/{task.total}"),
+                TextColumn("{task.percentage:>3.02f}%"),
+                FPSColumn(),
+                TimeRemainingColumn(),
+            )
+
+    def add_task(self, description: str, total: int) -> int:
+        """
+        :param description:     Task description
+        :param total:           Number of steps of the task
+        :return:                Task id
+        """
+        with self._lock:
+            rich_id = self._rich.add_task(description, total=total) if self._rich else None
+            self._tasks.append(_ProgressTask(description, total, rich_id))
+            return len(self._tasks) - 1
+
+    def start(self) -> None:
+        self._start = self._next = time.monotonic()
+        if self._rich:
+            self._rich.start()
+
+    def update(self, task: int, advance: int = 1) -> None:
+        """
+        :param task:            Task id
+        :param advance:         Number of steps done since the last update
+        """
+        with self._lock:
+            ptask = self._tasks[task]
+            ptask.completed += advance
+            now = time.monotonic()
+            if now >= self._next or ptask.completed >= ptask.total:
+                self._refresh(now)
+
+    def completed(self, task: int) -> int:
+        """
+        :param task:            Task id
+        :return:                Number of steps done
+        """
+        with self._lock:
+            return self._tasks[task].completed
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Display the pending updates"""
+        with self._lock:
+            self._refresh(time.monotonic() if now is None else now)
+
+    def _refresh(self, now: float) -> None:
+        self._next = now + self._interval
+        for ptask in self._tasks:
+            if ptask.reported == ptask.completed:
+                continue
+            ptask.reported = ptask.completed
+            if self._rich and ptask.rich_id is not None:
+                self._rich.update(ptask.rich_id, completed=ptask.completed)
+            else:
+                _write_line(self._file or sys.stderr, ptask.description, ptask.completed, ptask.total, now - self._start)
+
+    def stop(self) -> None:
+        self.refresh()
+        if self._rich:
+            self._rich.stop()
+
+
+class ThrottledUpdateFunc:
+    """
+    :py:data:`vardautomation.vtypes.UpdateFunc` for ``VideoNode.output``
+    that logs the progress at most :py:attr:`RenderProgress.rate` times per second.
+    """
+
+    def __init__(self, fmt: str, description: str, *, colors: bool = False) -> None:
+        """
+        :param fmt:             Printf-style format taking the value, the end value and the percentage
+        :param description:     Description used by ``ProgressMode.LINES``
+        :param colors:          Whether ``fmt`` contains loguru colour markups
+        """
+        self.fmt = fmt
+        self.description = description
+        self.colors = colors
+        self._start = self._next = 0.0
+        self._last = 0
+
+    def __call__(self, value: int, endvalue: int) -> None:
+        now = time.monotonic()
+        if value < self._last or not self._start:
+            self._start = now
+        self._last = value
+        if value == 0 or (now < self._next and value < endvalue):
+            return
+        self._next = now + (1 / RenderProgress.rate if RenderProgress.rate > 0 else 0.0)
+
+        if _resolve_mode(RenderProgress.mode) == ProgressMode.LINES:
+            _write_line(sys.stderr, self.description, value, endvalue, now - self._start)
+        else:
+            logger.logger.opt(raw=True, colors=self.colors).info(self.fmt % (value, endvalue, 100 * value / endvalue))
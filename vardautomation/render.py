@@ -1,44 +1,622 @@
 """Node rendering helpers"""
 
 __all__ = [
-    'clip_async_render',
-    'WaveHeader', 'audio_async_render'
+    'request_frames', 'extract_props', 'RenderStats', 'RenderStatsSummary', 'AdaptivePrefetch',
+    'clip_async_render', 'Y4MWriter',
+    'tee_render', 'RenderSink', 'Y4MSink', 'PropsSink', 'TimecodesSink', 'CallbackSink', 'SceneChangeSink',
+    'WaveHeader', 'audio_async_render', 'audios_async_render',
+    'clip_render_aio', 'audio_render_aio', 'find_scene_changes_aio'
 ]
 
 # pylint: disable=no-member
 
+import asyncio
+import io
+import json
+import os
+import queue
 import struct
+import threading
+import time
+import weakref
 
+from collections import deque
+from contextlib import aclosing, contextmanager
 from enum import IntEnum
-from typing import BinaryIO, Callable, Dict, List, Optional, TextIO, Tuple, overload
+from functools import partial, reduce
+from itertools import combinations
+from operator import and_, or_
+from typing import (
+    Any, AsyncGenerator, BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+    Sequence, Set, TextIO, Tuple, overload
+)
 
 import numpy as np
+import psutil
 import vapoursynth as vs
 
-from rich.progress import BarColumn, Progress, ProgressColumn, Task, TextColumn, TimeRemainingColumn
-from rich.text import Text
+from numpy.typing import NDArray
 
 from ._logging import logger
+from .progress import RenderProgress
+from .timecodes import Timecodes
 from .utils import Properties
+from .vpathlib import VPath
+from .vtypes import AnyPath
 
 
-class FPSColumn(ProgressColumn):
-    def render(self, task: Task) -> Text:
-        return Text(f"{task.speed or 0:.02f} fps")
+RenderCallback = Callable[[int, vs.VideoFrame], None]
 
 
-def get_render_progress() -> Progress:
-    return Progress(
-        TextColumn("{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total}"),
-        TextColumn("{task.percentage:>3.02f}%"),
-        FPSColumn(),
-        TimeRemainingColumn(),
-    )
+def _normalise_prefetch(prefetch: int, backlog: int) -> Tuple[int, int]:
+    # Same defaults as VideoNode.output
+    if prefetch < 1:
+        prefetch = vs.core.num_threads
+    if backlog < 0:
+        backlog = prefetch * 3
+    elif backlog < prefetch:
+        backlog = prefetch
+    return prefetch, backlog
+
+
+class RenderStatsSummary(NamedTuple):
+    """Summary of a :py:class:`RenderStats`. Times are in seconds"""
+
+    frames: int
+    """Number of rendered frames"""
+    elapsed: float
+    """Time between the first request and the last frame consumed"""
+    fps: float
+    """Effective frame rate"""
+    latency_p50: float
+    """Median time between the request of a frame and its completion"""
+    latency_p95: float
+    """95th percentile of the latency"""
+    latency_p99: float
+    """99th percentile of the latency"""
+    queue_depth: float
+    """Mean number of frames in flight when a frame was consumed"""
+    frame_wait: float
+    """Total time the consumer waited for VapourSynth to complete a frame"""
+    sink_stall: float
+    """Total time spent handing the frames to the consumer, e.g. writing them to a pipe or a file"""
+
+
+class RenderStats:
+    """
+    Opt-in per-frame timings of a render, kept in a ring buffer.
 
+    A high ``frame_wait`` means the render is bound by the filter chain,
+    a high ``sink_stall`` means it is bound by the encoder pipe or the disk.
+    """
 
-RenderCallback = Callable[[int, vs.VideoFrame], None]
+    __slots__ = ('size', 'json_file', '_latency', '_depth', '_wait', '_write', '_count', '_start', '_end')
+
+    def __init__(self, size: int = 1 << 16, json_file: Optional[AnyPath] = None) -> None:
+        """
+        :param size:        Number of frames kept. Percentiles are computed over the last ``size`` frames,
+                            totals over the whole render.
+        :param json_file:   If specified, :py:func:`report` also dumps the summary and the buffered timings there.
+        """
+        self.size = size
+        self.json_file = VPath(json_file) if json_file else None
+        self._latency = np.zeros(size, np.float64)
+        self._depth = np.zeros(size, np.int32)
+        self._wait = np.zeros(size, np.float64)
+        self._write = np.zeros(size, np.float64)
+        self._count = 0
+        self._start = self._end = 0.0
+
+    def start(self) -> None:
+        self._start = self._end = time.perf_counter()
+
+    def record(self, latency: float, depth: int, wait: float, write: float) -> None:
+        """
+        :param latency:     Time between the request of the frame and its completion
+        :param depth:       Number of frames in flight
+        :param wait:        Time the consumer waited for the frame
+        :param write:       Time the consumer spent on the frame
+        """
+        i = self._count % self.size
+        self._latency[i] = latency
+        self._depth[i] = depth
+        self._wait[i] = wait
+        self._write[i] = write
+        self._count += 1
+        self._end = time.perf_counter()
+
+    def summary(self) -> RenderStatsSummary:
+        frames = min(self._count, self.size)
+        elapsed = self._end - self._start
+        p50, p95, p99 = np.percentile(self._latency[:frames], [50, 95, 99]).tolist() if frames else (0.0, 0.0, 0.0)
+        # Wait and write times of the frames dropped from the ring are accounted for in proportion
+        scale = self._count / frames if frames else 0.0
+        return RenderStatsSummary(
+            self._count, elapsed, self._count / elapsed if elapsed > 0 else 0.0, p50, p95, p99,
+            float(self._depth[:frames].mean()) if frames else 0.0,
+            float(self._wait[:frames].sum()) * scale, float(self._write[:frames].sum()) * scale
+        )
+
+    def report(self) -> RenderStatsSummary:
+        """
+        Log the summary and dump it to ``json_file`` if specified
+
+        :return:            Summary
+        """
+        summary = self.summary()
+        logger.info(
+            f'Rendered {summary.frames} frames in {summary.elapsed:.2f}s ({summary.fps:.2f} fps); '
+            + f'latency p50/p95/p99: {summary.latency_p50 * 1000:.1f}/{summary.latency_p95 * 1000:.1f}/'
+            + f'{summary.latency_p99 * 1000:.1f} ms; mean queue depth: {summary.queue_depth:.1f}; '
+            + f'waiting on VapourSynth: {summary.frame_wait:.2f}s; stalled on output: {summary.sink_stall:.2f}s'
+        )
+        if self.json_file:
+            # Oldest frame first
+            order = np.roll(np.arange(self.size), -(self._count % self.size))[-min(self._count, self.size):]
+            with self.json_file.open('w', encoding='utf-8') as file:
+                json.dump(dict(
+                    summary=summary._asdict(),
+                    latency=self._latency[order].tolist(), queue_depth=self._depth[order].tolist(),
+                    wait=self._wait[order].tolist(), write=self._write[order].tolist()
+                ), file)
+        return summary
+
+
+class AdaptivePrefetch:
+    """
+    Tunes the number of frames requested in advance while rendering.
+
+    The prefetch grows while the consumer waits for VapourSynth and shrinks when the RSS of the process
+    goes over the memory budget. The backlog is bounded by the number of frames that still fit in the budget.
+    One instance can be shared by renders running at once, e.g. the chunks of an encode:
+    each render is tuned on its own timings and gets an even share of the budget.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None, max_prefetch: int = 0, interval: float = 0.5) -> None:
+        """
+        :param memory_budget:   Maximum RSS of the process in bytes.
+                                Defaults to the current RSS plus half of the available memory.
+        :param max_prefetch:    Upper bound of the prefetch. Defaults to twice ``core.num_threads``.
+        :param interval:        Time in seconds between two adjustments.
+        """
+        self.process = psutil.Process()
+        self.memory_budget = memory_budget or self.process.memory_info().rss + psutil.virtual_memory().available // 2
+        self.max_prefetch = max_prefetch or vs.core.num_threads * 2
+        self.interval = interval
+        self._lock = threading.Lock()
+        # Time waited, time busy and time of the next adjustment of every requester
+        self._state: weakref.WeakKeyDictionary[_FrameRequester, Tuple[float, float, float]] = weakref.WeakKeyDictionary()
+
+    def update(self, requester: '_FrameRequester', wait: float, busy: float) -> None:
+        """
+        :param requester:       Requester being tuned
+        :param wait:            Time the consumer waited for the last frame
+        :param busy:            Time the consumer spent on the last frame
+        """
+        now = time.monotonic()
+        with self._lock:
+            total_wait, total_busy, next_update = self._state.get(requester, (0.0, 0.0, now + self.interval))
+            total_wait += wait
+            total_busy += busy
+            if now < next_update:
+                self._state[requester] = (total_wait, total_busy, next_update)
+                return
+            self._state[requester] = (0.0, 0.0, now + self.interval)
+            requesters = len(self._state)
+
+        # Number of frames that still fit in this requester's share of the budget
+        headroom = (self.memory_budget - self.process.memory_info().rss) // _frame_size(requester.node) // requesters
+        starving = total_wait > 0.1 * (total_wait + total_busy)
+
+        with requester.cond:
+            prefetch = requester.prefetch
+            if headroom < 0:
+                prefetch = max(1, min(prefetch - 1, prefetch + headroom))
+            elif starving and headroom > 0:
+                prefetch = min(self.max_prefetch, prefetch + max(1, prefetch // 4), prefetch + headroom)
+            backlog = max(prefetch, min(prefetch * 3, len(requester.pending) + headroom))
+            if (prefetch, backlog) != (requester.prefetch, requester.backlog):
+                logger.trace(f'AdaptivePrefetch: prefetch={prefetch}, backlog={backlog}')
+            requester.prefetch, requester.backlog = prefetch, backlog
+        requester.fill()
+
+
+def _frame_size(node: vs.VideoNode | vs.AudioNode) -> int:
+    if isinstance(node, vs.AudioNode):
+        return AUDIO_FRAME_SAMPLES * node.num_channels * node.bytes_per_sample
+    assert node.format
+    fmt = node.format
+    luma = node.width * node.height
+    chroma = (node.width >> fmt.subsampling_w) * (node.height >> fmt.subsampling_h)
+    return max(1, (luma + chroma * (fmt.num_planes - 1)) * fmt.bytes_per_sample)
+
+
+class _FrameRequester:
+    """Keeps a bounded window of frames requested with get_frame_async"""
+
+    def __init__(self, node: vs.VideoNode | vs.AudioNode, numbers: Iterable[int], prefetch: int, backlog: int,
+                 stats: Optional[RenderStats] = None, adaptive: Optional[AdaptivePrefetch] = None) -> None:
+        self.node = node
+        self.stats = stats
+        self.adaptive = adaptive
+        # Request times, then latencies once done
+        self.times: Dict[int, float] = {}
+        self.numbers = iter(numbers)
+        self.prefetch, self.backlog = _normalise_prefetch(prefetch, backlog)
+        self.cond = threading.Condition()
+        # Frames (or errors) done but not consumed yet
+        self.done: Dict[int, vs.RawFrame | BaseException] = {}
+        # Frames requested but not consumed yet, in request order
+        self.pending: Deque[int] = deque()
+        self.in_flight = 0
+        self.exhausted = False
+        self.stopped = False
+
+    def fill(self) -> None:
+        to_request: List[int] = []
+        with self.cond:
+            while (
+                not self.stopped and not self.exhausted
+                and self.in_flight < self.prefetch and len(self.pending) < self.backlog
+            ):
+                try:
+                    n = next(self.numbers)
+                except StopIteration:
+                    self.exhausted = True
+                    break
+                self.pending.append(n)
+                self.in_flight += 1
+                to_request.append(n)
+            if self.stats:
+                now = time.perf_counter()
+                self.times.update((n, now) for n in to_request)
+        for n in to_request:
+            self.node.get_frame_async(n, partial(self._on_done, n))
+
+    def _on_done(self, n: int, frame: Optional[vs.RawFrame], error: Optional[Exception]) -> None:
+        with self.cond:
+            self.in_flight -= 1
+            if self.stopped:
+                if frame is not None:
+                    frame.close()
+            else:
+                self.done[n] = frame if frame is not None else error or vs.Error(f'Failed to get frame {n}')
+                if self.stats:
+                    self.times[n] = time.perf_counter() - self.times[n]
+            self.cond.notify_all()
+        self.fill()
+
+    def take(self, ordered: bool) -> Tuple[int, vs.RawFrame]:
+        with self.cond:
+            if ordered:
+                n = self.pending[0]
+                while n not in self.done:
+                    self.cond.wait()
+                self.pending.popleft()
+            else:
+                while not self.done:
+                    self.cond.wait()
+                n = next(iter(self.done))
+                self.pending.remove(n)
+            res = self.done.pop(n)
+        if isinstance(res, BaseException):
+            raise res
+        return n, res
+
+    def stop(self) -> None:
+        with self.cond:
+            self.stopped = True
+            for res in self.done.values():
+                if not isinstance(res, BaseException):
+                    res.close()
+            self.done.clear()
+
+    def run(self, ordered: bool, close: bool) -> Iterator[Tuple[int, vs.RawFrame]]:
+        stats, adaptive = self.stats, self.adaptive
+        timed = stats is not None or adaptive is not None
+        try:
+            if stats:
+                stats.start()
+            self.fill()
+            while self.pending:
+                t0 = time.perf_counter() if timed else 0.0
+                n, frame = self.take(ordered)
+                t1 = time.perf_counter() if timed else 0.0
+                self.fill()
+                try:
+                    yield n, frame
+                finally:
+                    if close:
+                        frame.close()
+                if timed:
+                    t2 = time.perf_counter()
+                    if stats:
+                        stats.record(self.times.pop(n), self.in_flight, t1 - t0, t2 - t1)
+                    if adaptive:
+                        adaptive.update(self, t1 - t0, t2 - t1)
+        finally:
+            self.stop()
+
+
+@overload
+def request_frames(node: vs.VideoNode, frames: Optional[Iterable[int]] = None, *,
+                   prefetch: int = 0, backlog: int = -1,
+                   ordered: bool = True, close: bool = True,
+                   stats: Optional[RenderStats] = None,
+                   adaptive: Optional[AdaptivePrefetch] = None) -> Iterator[Tuple[int, vs.VideoFrame]]:
+    ...
+
+
+@overload
+def request_frames(node: vs.AudioNode, frames: Optional[Iterable[int]] = None, *,
+                   prefetch: int = 0, backlog: int = -1,
+                   ordered: bool = True, close: bool = True,
+                   stats: Optional[RenderStats] = None,
+                   adaptive: Optional[AdaptivePrefetch] = None) -> Iterator[Tuple[int, vs.AudioFrame]]:
+    ...
+
+
+def request_frames(node: vs.VideoNode | vs.AudioNode, frames: Optional[Iterable[int]] = None, *,
+                   prefetch: int = 0, backlog: int = -1,
+                   ordered: bool = True, close: bool = True,
+                   stats: Optional[RenderStats] = None,
+                   adaptive: Optional[AdaptivePrefetch] = None) -> Iterator[Tuple[int, vs.RawFrame]]:
+    """
+    Request frames with ``get_frame_async`` inside a bounded window
+    and yield them with their frame number.
+
+    Frames are rendered out of order by the VapourSynth threads and reordered
+    before being yielded if ``ordered`` is True.
+
+    :param node:            VideoNode or AudioNode to be rendered.
+    :param frames:          Frame numbers to request, in that order. Default to every frame of the node.
+    :param prefetch:        Max number of concurrent rendered frames.
+                            Defaults to ``core.num_threads`` like in ``VideoNode.output``.
+    :param backlog:         How many unconsumed frames (including those that did not finish rendering yet)
+                            are buffered at most before no additional frame is requested.
+                            Defaults to ``prefetch * 3`` like in ``VideoNode.output``.
+    :param ordered:         If False, frames are yielded as soon as they are done.
+    :param close:           Close each frame once the consumer is done with it.
+    :param stats:           If specified, per-frame timings are recorded into it.
+    :param adaptive:        If specified, ``prefetch`` and ``backlog`` are only the starting values
+                            and are tuned by it while rendering.
+
+    :return:                An iterator of frame numbers and frames.
+    """
+    return _FrameRequester(
+        node, range(node.num_frames) if frames is None else frames, prefetch, backlog, stats, adaptive
+    ).run(ordered, close)
+
+
+def extract_props(clip: vs.VideoNode, keys: Sequence[str], frames: Optional[Sequence[int]] = None, *,
+                  dtypes: Optional[Dict[str, Any]] = None, default: Optional[Any] = None,
+                  progress: Optional[str] = None, display: Optional[RenderProgress] = None,
+                  prefetch: int = 0, backlog: int = -1) -> Dict[str, NDArray[Any]]:
+    """
+    Read frame props in a single pass into NumPy arrays, one column per key.
+
+    :param clip:        Clip to read the props from.
+    :param keys:        Names of the frame props.
+    :param frames:      Frame numbers to read, defaults to every frame of the clip.
+    :param dtypes:      NumPy dtype of some columns.
+                        Others are inferred from the first frame: int64 for integers, float64 for floats,
+                        fixed-width bytes for data props and object for anything else.
+    :param default:     Value of missing props. If ``None``, a missing prop raises a KeyError.
+    :param progress:    String to use for render progress display.
+                        If empty or ``None``, no progress display.
+    :param display:     Progress display the task is added to, e.g. to share one display across several calls.
+                        It is neither started nor stopped. Defaults to a new display.
+    :param prefetch:    See :py:func:`request_frames`.
+    :param backlog:     See :py:func:`request_frames`.
+
+    :return:            Dictionary of the columns, each one in the order of ``frames``.
+    """
+    frames = range(clip.num_frames) if frames is None else frames
+    dtypes = dict(dtypes or {})
+    rows: Dict[str, List[Any]] = {k: [] for k in keys}
+
+    with _progress_task(progress, len(frames), display) as advance:
+        for _, f in request_frames(clip, frames, prefetch=prefetch, backlog=backlog):
+            _append_props(f, rows, default)
+            advance(1)
+
+    return _props_columns(rows, dtypes)
+
+
+@contextmanager
+def _progress_task(description: Optional[str], total: int,
+                   display: Optional[RenderProgress] = None) -> Iterator[Callable[[int], None]]:
+    # Add a task to ``display``, or to a new display running for the duration of the block
+    if not description:
+        yield lambda advance: None
+        return
+    p = display or RenderProgress()
+    task = p.add_task(description, total=total)
+    if not display:
+        p.start()
+    try:
+        yield partial(p.update, task)
+    finally:
+        if not display:
+            p.stop()
+
+
+def _append_props(f: vs.VideoFrame, rows: Dict[str, List[Any]], default: Optional[Any]) -> None:
+    props = f.props
+    for k, column in rows.items():
+        try:
+            column.append(props[k])
+        except KeyError:
+            if default is None:
+                raise KeyError(f'extract_props: key {k} not present in props') from None
+            column.append(default)
+
+
+def _props_columns(rows: Dict[str, List[Any]], dtypes: Dict[str, Any]) -> Dict[str, NDArray[Any]]:
+    return {k: np.array(column, dtypes.get(k) or _prop_dtype(column)) for k, column in rows.items()}
+
+
+def _prop_dtype(column: List[Any]) -> Any:
+    if not column:
+        return np.int64
+    first = column[0]
+    if isinstance(first, int):
+        return np.int64
+    if isinstance(first, float):
+        return np.float64
+    if isinstance(first, bytes):
+        return np.bytes_
+    if isinstance(first, str):
+        return np.str_
+    return object
+
+
+Y4M_FRAME_HEADER = b'FRAME\n'
+# Smallest IOV_MAX guaranteed by POSIX systems we care about (Linux, macOS, BSDs)
+_IOV_MAX = 1024
+
+
+class Y4MWriter:
+    """
+    YUV4MPEG2 writer gathering the frame header and all the planes of a frame in one write.
+
+    If the output is backed by a raw file descriptor (regular files, pipes, ``sys.stdout.buffer``...)
+    the frame header and the plane memoryviews are written with a single vectored ``os.writev`` call,
+    without copying the planes.
+    Otherwise the chunks are written through ``outfile.write``.
+
+    Frames smaller than ``coalesce_size`` are copied into a reusable buffer which is written
+    once it is full, reducing the number of syscalls for small clips.
+    """
+
+    __slots__ = ('outfile', 'coalesce_size', 'y4m', '_fd', '_buffer', '_pos')
+
+    outfile: BinaryIO
+    """Y4MPEG output BinaryIO handle"""
+
+    coalesce_size: int
+    """Size in bytes of the coalescing buffer"""
+
+    y4m: bool
+    """Write the YUV4MPEG2 headers. If False, only the raw planes are written"""
+
+    def __init__(self, outfile: BinaryIO, coalesce_size: int = 1 << 20, y4m: bool = True) -> None:
+        """
+        :param outfile:         Y4MPEG render output BinaryIO handle.
+        :param coalesce_size:   Size in bytes of the buffer used to group small frames in one write.
+                                Frames bigger than this size are written directly.
+                                ``0`` disables the coalescing. (Default: 1 MiB)
+        :param y4m:             Write the YUV4MPEG2 headers. If False, only the raw planes are written
+                                like ``VideoNode.output(y4m=False)``.
+        """
+        self.outfile = outfile
+        self.coalesce_size = coalesce_size
+        self.y4m = y4m
+        self._fd = _get_raw_fd(outfile)
+        self._buffer = memoryview(bytearray(coalesce_size))
+        self._pos = 0
+        if self._fd is not None:
+            # Anything already buffered must reach the file descriptor before our own writes
+            outfile.flush()
+
+    def write_header(self, clip: vs.VideoNode) -> None:
+        """
+        Write the YUV4MPEG2 stream header of the specified clip
+
+        :param clip:            Clip to be rendered
+        """
+        if self.y4m:
+            self._write([_y4m_header(clip)])
+
+    def write_frame(self, frame: vs.VideoFrame) -> None:
+        """
+        Write a frame and its header.
+        The planes are either written or copied when this method returns
+        so the frame can be closed right after.
+
+        :param frame:           Frame to write
+        """
+        chunks: List[bytes | memoryview] = [Y4M_FRAME_HEADER] if self.y4m else []
+        chunks.extend(chunk.cast('B') for chunk in frame.readchunks())
+        size = sum(len(chunk) for chunk in chunks)
+
+        if self._pos + size > self.coalesce_size:
+            self.flush()
+
+        if size >= self.coalesce_size:
+            self._write(chunks)
+            return
+
+        for chunk in chunks:
+            end = self._pos + len(chunk)
+            self._buffer[self._pos:end] = chunk
+            self._pos = end
+
+    def flush(self) -> None:
+        """Write the content of the coalescing buffer"""
+        if self._pos:
+            self._write([self._buffer[:self._pos]])
+            self._pos = 0
+
+    def _write(self, chunks: Sequence[bytes | memoryview]) -> None:
+        if self._fd is None:
+            for chunk in chunks:
+                self.outfile.write(chunk)
+        else:
+            _writev_all(self._fd, chunks)
+
+
+def _get_raw_fd(outfile: BinaryIO) -> Optional[int]:
+    if not hasattr(os, 'writev'):
+        return None
+    # Only trust the file descriptor of plain files.
+    # Wrappers like GzipFile also expose the descriptor of the file they are wrapping.
+    raw = outfile.raw if isinstance(outfile, (io.BufferedWriter, io.BufferedRandom)) else outfile
+    if not isinstance(raw, io.FileIO):
+        return None
+    try:
+        return raw.fileno()
+    except (OSError, ValueError):
+        return None
+
+
+def _writev_all(fd: int, chunks: Sequence[bytes | memoryview]) -> None:
+    views = [memoryview(chunk) for chunk in chunks]
+    i = 0
+    while i < len(views):
+        written = os.writev(fd, views[i:i + _IOV_MAX])
+        # Skip the chunks fully written and keep the remaining part of a partially written one
+        while i < len(views) and written >= len(views[i]):
+            written -= len(views[i])
+            i += 1
+        if written:
+            views[i] = views[i][written:]
+
+
+def _y4m_header(clip: vs.VideoNode) -> bytes:
+    if clip.format is None:
+        raise ValueError("clip_async_render: 'Cannot render a variable format clip to y4m!'")
+    if clip.format.color_family not in (vs.YUV, vs.GRAY):
+        raise ValueError("clip_async_render: 'Can only render YUV and GRAY clips to y4m!'")
+    if clip.format.color_family == vs.GRAY:
+        y4mformat = "mono"
+    else:
+        try:
+            formats: Dict[Tuple[int, int], str] = {
+                (1, 1): "420",
+                (1, 0): "422",
+                (0, 0): "444",
+                (2, 2): "410",
+                (2, 0): "411",
+                (0, 1): "440",
+            }
+            y4mformat = formats[(clip.format.subsampling_w, clip.format.subsampling_h)]
+        except KeyError as key_err:
+            raise ValueError("clip_async_render: 'What have you done'") from key_err
+
+    y4mformat = f"{y4mformat}p{clip.format.bits_per_sample}" if clip.format.bits_per_sample > 8 else y4mformat
+    header = f"YUV4MPEG2 C{y4mformat} W{clip.width} H{clip.height} F{clip.fps.numerator}:{clip.fps.denominator} Ip A0:0\n"
+    return header.encode("utf-8")
 
 
 @overload
@@ -46,7 +624,10 @@ def clip_async_render(clip: vs.VideoNode,  # type: ignore [misc]
                       outfile: Optional[BinaryIO] = None,
                       timecodes: None = ...,
                       progress: Optional[str] = "Rendering clip...",
-                      callback: RenderCallback | List[RenderCallback] | None = None) -> None:
+                      callback: RenderCallback | List[RenderCallback] | None = None,
+                      coalesce_size: int = ...,
+                      prefetch: int = ..., backlog: int = ...,
+                      stats: Optional[RenderStats] = ...) -> None:
     ...
 
 
@@ -55,7 +636,10 @@ def clip_async_render(clip: vs.VideoNode,
                       outfile: Optional[BinaryIO] = None,
                       timecodes: TextIO = ...,
                       progress: Optional[str] = "Rendering clip...",
-                      callback: RenderCallback | List[RenderCallback] | None = None) -> List[float]:
+                      callback: RenderCallback | List[RenderCallback] | None = None,
+                      coalesce_size: int = ...,
+                      prefetch: int = ..., backlog: int = ...,
+                      stats: Optional[RenderStats] = ...) -> List[float]:
     ...
 
 
@@ -64,9 +648,12 @@ def clip_async_render(clip: vs.VideoNode,  # noqa: C901
                       outfile: Optional[BinaryIO] = None,
                       timecodes: TextIO | None = None,
                       progress: Optional[str] = "Rendering clip...",
-                      callback: RenderCallback | List[RenderCallback] | None = None) -> None | List[float]:
+                      callback: RenderCallback | List[RenderCallback] | None = None,
+                      coalesce_size: int = 1 << 20,
+                      prefetch: int = 0, backlog: int = -1,
+                      stats: Optional[RenderStats] = None) -> None | List[float]:
     """
-    Render a clip by requesting frames asynchronously using clip.frames,
+    Render a clip by requesting frames asynchronously using :py:func:`request_frames`,
     providing for callback with frame number and frame object.
 
     This is mostly a re-implementation of VideoNode.output, but a little bit slower since it's pure python.
@@ -75,21 +662,29 @@ def clip_async_render(clip: vs.VideoNode,  # noqa: C901
 
     Original function borrowed from lvsfunc.render.clip_async_render.
 
-    :param clip:      Clip to render.
-    :param outfile:   Y4MPEG render output BinaryIO handle. If None, no Y4M output is performed.
-                      Use ``sys.stdout.buffer`` for stdout. (Default: None)
-    :param timecodes: Timecode v2 file TextIO handle. If None, timecodes will not be written.
-    :param progress:  String to use for render progress display.
-                      If empty or ``None``, no progress display.
-    :param callback:  Single or list of callbacks to be preformed. The callbacks are called
-                      when each sequential frame is output, not when each frame is done.
-
-    :return:          List of timecodes from rendered clip.
+    :param clip:            Clip to render.
+    :param outfile:         Y4MPEG render output BinaryIO handle. If None, no Y4M output is performed.
+                            Use ``sys.stdout.buffer`` for stdout. (Default: None)
+    :param timecodes:       Timecode v2 file TextIO handle. If None, timecodes will not be written.
+    :param progress:        String to use for render progress display.
+                            If empty or ``None``, no progress display.
+    :param callback:        Single or list of callbacks to be preformed. The callbacks are called
+                            when each sequential frame is output, not when each frame is done.
+    :param coalesce_size:   Size in bytes of the buffer grouping small frames in one write.
+                            See :py:class:`Y4MWriter`. (Default: 1 MiB)
+    :param prefetch:        Max number of concurrent rendered frames.
+                            Defaults to ``core.num_threads`` like in ``VideoNode.output``.
+    :param backlog:         How many unconsumed frames (including those that did not finish rendering yet)
+                            are buffered at most before no additional frame is requested.
+                            Defaults to ``prefetch * 3`` like in ``VideoNode.output``.
+    :param stats:           If specified, per-frame timings are recorded into it and reported at the end.
+
+    :return:                List of timecodes from rendered clip.
     """
     cbl = [] if callback is None else callback if isinstance(callback, list) else [callback]
 
     if progress:
-        p = get_render_progress()
+        p = RenderProgress()
         task = p.add_task(progress, total=clip.num_frames)
         p.start()
 
@@ -98,63 +693,260 @@ def clip_async_render(clip: vs.VideoNode,  # noqa: C901
 
         cbl.append(_progress_cb)
 
+    writer: Optional[Y4MWriter] = None
     if outfile:
-        if clip.format is None:
-            raise ValueError("clip_async_render: 'Cannot render a variable format clip to y4m!'")
-        if clip.format.color_family not in (vs.YUV, vs.GRAY):
-            raise ValueError("clip_async_render: 'Can only render YUV and GRAY clips to y4m!'")
-        if clip.format.color_family == vs.GRAY:
-            y4mformat = "mono"
-        else:
-            try:
-                formats: Dict[Tuple[int, int], str] = {
-                    (1, 1): "420",
-                    (1, 0): "422",
-                    (0, 0): "444",
-                    (2, 2): "410",
-                    (2, 0): "411",
-                    (0, 1): "440",
-                }
-                y4mformat = formats[(clip.format.subsampling_w, clip.format.subsampling_h)]
-            except KeyError as key_err:
-                raise ValueError("clip_async_render: 'What have you done'") from key_err
-
-        y4mformat = f"{y4mformat}p{clip.format.bits_per_sample}" if clip.format.bits_per_sample > 8 else y4mformat
-        header = f"YUV4MPEG2 C{y4mformat} W{clip.width} H{clip.height} F{clip.fps.numerator}:{clip.fps.denominator} Ip A0:0\n"
-        outfile.write(header.encode("utf-8"))
-
-    if timecodes:
-        timecodes.write("# timestamp format v2\n")
+        writer = Y4MWriter(outfile, coalesce_size)
+        writer.write_header(clip)
 
-    tc_list = [0.0]
+    tcs = Timecodes()
 
     try:
-        for n, f in enumerate(clip.frames(close=True)):
+        for n, f in request_frames(clip, prefetch=prefetch, backlog=backlog, stats=stats):
             for cb in cbl:
                 cb(n, f)
             if timecodes:
-                _write_timecodes(f, timecodes, tc_list)
-            if outfile:
-                _finish_frame_video(f, outfile)
+                tcs.append_frame(f)
+            if writer:
+                writer.write_frame(f)
     except KeyboardInterrupt as keyb_err:
         logger.error('', keyb_err)
     finally:
+        if writer:
+            writer.flush()
         if progress:
             p.stop()  # type: ignore[pylance]
 
-    return tc_list if timecodes else None
+    if stats:
+        stats.report()
+
+    if timecodes:
+        tcs.write_v2(timecodes)
+        return tcs.seconds()
+    return None
+
+
+class RenderSink:
+    """
+    Frame consumer of :py:func:`tee_render`.
+    Every sink runs in its own thread and receives the frames in order.
+    """
+
+    def start(self, clip: vs.VideoNode) -> None:
+        """
+        Called before the first frame
+
+        :param clip:            Clip to be rendered
+        """
 
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        """
+        Called for every frame. The frame mustn't be kept after this method returns.
 
-def _finish_frame_video(frame: vs.VideoFrame, outfile: BinaryIO) -> None:
-    outfile.write("FRAME\n".encode("utf-8"))
-    for plane in frame:  # type: ignore [attr-defined]
-        outfile.write(plane)
+        :param n:               Frame number
+        :param frame:           Rendered frame
+        """
 
+    def close(self) -> None:
+        """Called after the last frame, even if the render failed"""
 
-def _write_timecodes(frame: vs.VideoFrame, timecodes: TextIO, tc_list: List[float]) -> None:
-    tc = tc_list[-1] + Properties.get_prop(frame, '_DurationNum', int) / Properties.get_prop(frame, '_DurationDen', int)
-    tc_list.append(tc)
-    timecodes.write(f"{round(tc * 1000):d}\n")
+
+class Y4MSink(RenderSink):
+    """Writes the frames to a BinaryIO handle using a :py:class:`Y4MWriter`"""
+
+    def __init__(self, outfile: BinaryIO, y4m: bool = True, coalesce_size: int = 1 << 20) -> None:
+        """
+        :param outfile:         Render output BinaryIO handle.
+        :param y4m:             Write the YUV4MPEG2 headers.
+        :param coalesce_size:   See :py:class:`Y4MWriter`.
+        """
+        self.outfile = outfile
+        self.y4m = y4m
+        self.coalesce_size = coalesce_size
+        self.writer: Optional[Y4MWriter] = None
+
+    def start(self, clip: vs.VideoNode) -> None:
+        self.writer = Y4MWriter(self.outfile, self.coalesce_size, self.y4m)
+        self.writer.write_header(clip)
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        assert self.writer
+        self.writer.write_frame(frame)
+
+    def close(self) -> None:
+        if self.writer:
+            self.writer.flush()
+
+
+class PropsSink(RenderSink):
+    """Collects frame props into NumPy columns like :py:func:`extract_props`"""
+
+    columns: Dict[str, NDArray[Any]]
+    """Columns of the props, available once the render is done"""
+
+    def __init__(self, keys: Sequence[str], dtypes: Optional[Dict[str, Any]] = None, default: Optional[Any] = None) -> None:
+        """
+        :param keys:            Names of the frame props.
+        :param dtypes:          See :py:func:`extract_props`.
+        :param default:         See :py:func:`extract_props`.
+        """
+        self.dtypes = dict(dtypes or {})
+        self.default = default
+        self._rows: Dict[str, List[Any]] = {k: [] for k in keys}
+        self.columns = {}
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        _append_props(frame, self._rows, self.default)
+
+    def close(self) -> None:
+        self.columns = _props_columns(self._rows, self.dtypes)
+
+
+class TimecodesSink(RenderSink):
+    """Writes timecodes v2 like the ``timecodes`` parameter of :py:func:`clip_async_render`"""
+
+    timecodes: Timecodes
+    """Timecodes of the rendered frames"""
+
+    def __init__(self, timecodes: TextIO) -> None:
+        """
+        :param timecodes:       Timecode v2 file TextIO handle.
+        """
+        self.outfile = timecodes
+        self.timecodes = Timecodes()
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        self.timecodes.append_frame(frame)
+
+    def close(self) -> None:
+        self.timecodes.write_v2(self.outfile)
+
+
+class CallbackSink(RenderSink):
+    """Calls a :py:data:`RenderCallback` for every frame"""
+
+    def __init__(self, callback: RenderCallback) -> None:
+        """
+        :param callback:        Callback called with the frame number and the frame
+        """
+        self.callback = callback
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        self.callback(n, frame)
+
+
+class _SharedFrame:
+    __slots__ = ('frame', 'refs', 'lock')
+
+    def __init__(self, frame: vs.VideoFrame, refs: int) -> None:
+        self.frame = frame
+        self.refs = refs
+        self.lock = threading.Lock()
+
+    def release(self) -> None:
+        with self.lock:
+            self.refs -= 1
+            if self.refs:
+                return
+        self.frame.close()
+
+
+class _SinkWorker(threading.Thread):
+    def __init__(self, sink: RenderSink, queue_size: int) -> None:
+        super().__init__(name=f'{sink.__class__.__name__}', daemon=True)
+        self.sink = sink
+        self.queue: queue.Queue[Optional[Tuple[int, _SharedFrame]]] = queue.Queue(queue_size)
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        while (item := self.queue.get()) is not None:
+            n, shared = item
+            try:
+                # Keep draining the queue after a failure so the producer never blocks
+                if self.error is None:
+                    self.sink.write(n, shared.frame)
+            except BaseException as err:
+                self.error = err
+            finally:
+                shared.release()
+
+
+@logger.catch
+def tee_render(clip: vs.VideoNode, sinks: Sequence[RenderSink], *,
+               progress: Optional[str] = "Rendering clip...",
+               queue_size: int = 4, prefetch: int = 0, backlog: int = -1,
+               stats: Optional[RenderStats] = None) -> None:
+    """
+    Render a clip once and fan out every frame to several sinks.
+
+    Each sink consumes the frames in order in its own thread, through a queue of ``queue_size`` frames.
+    When the queue of the slowest sink is full no additional frame is requested,
+    so the render runs at the pace of the slowest sink.
+
+    :param clip:            Clip to render.
+    :param sinks:           Frame consumers, e.g. :py:class:`Y4MSink`, :py:class:`PropsSink`,
+                            :py:class:`TimecodesSink`, :py:class:`CallbackSink` or :py:class:`SceneChangeSink`.
+    :param progress:        String to use for render progress display.
+                            If empty or ``None``, no progress display.
+    :param queue_size:      Maximum number of frames waiting for each sink.
+    :param prefetch:        See :py:func:`request_frames`.
+    :param backlog:         See :py:func:`request_frames`.
+    :param stats:           If specified, per-frame timings are recorded into it and reported at the end.
+                            The output stall is the time spent waiting on the queue of the slowest sink.
+    """
+    workers = [_SinkWorker(sink, queue_size) for sink in sinks]
+
+    if progress:
+        p = RenderProgress()
+        task = p.add_task(progress, total=clip.num_frames)
+        p.start()
+
+    frames = request_frames(clip, prefetch=prefetch, backlog=backlog, close=False, stats=stats)
+    try:
+        for sink in sinks:
+            sink.start(clip)
+        for worker in workers:
+            worker.start()
+
+        for n, f in frames:
+            shared = _SharedFrame(f, len(workers))
+            for worker in workers:
+                worker.queue.put((n, shared))
+            _raise_sink_error(workers)
+            if progress:
+                p.update(task, advance=1)  # type: ignore[pylance-strict]
+    finally:
+        # Stop requesting frames right away if a sink failed
+        frames.close()  # type: ignore[attr-defined]
+        for worker in workers:
+            if worker.is_alive():
+                worker.queue.put(None)
+                worker.join()
+        if progress:
+            p.stop()  # type: ignore[pylance-strict]
+        _close_sinks(sinks)
+
+    _raise_sink_error(workers)
+
+    if stats:
+        stats.report()
+
+
+def _close_sinks(sinks: Sequence[RenderSink]) -> None:
+    # Every sink is closed even if another one fails to
+    error: Optional[Exception] = None
+    for sink in sinks:
+        try:
+            sink.close()
+        except Exception as err:
+            error = error or err
+    if error:
+        raise error
+
+
+def _raise_sink_error(workers: Sequence[_SinkWorker]) -> None:
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
 
 
 class WaveFormat(IntEnum):
@@ -176,6 +968,9 @@ class WaveHeader(IntEnum):
     AUTO = 2
 
 
+# Number of samples of every audio frame but the last one
+AUDIO_FRAME_SAMPLES = 3072
+
 WAVE_RIFF_TAG = b'RIFF'
 WAVE_WAVE_TAG = b'WAVE'
 WAVE_FMT_TAG = b'fmt '
@@ -195,7 +990,9 @@ WAVE_FMT_EXTENSIBLE_SUBFORMAT = (
 def audio_async_render(audio: vs.AudioNode,
                        outfile: BinaryIO,
                        header: WaveHeader = WaveHeader.AUTO,
-                       progress: Optional[str] = "Rendering audio...") -> None:
+                       progress: Optional[str] = "Rendering audio...",
+                       mmap: bool = False,
+                       prefetch: int = 0, backlog: int = -1) -> None:
     """
     Render an audio by requesting frames asynchronously using audio.frames.
 
@@ -212,12 +1009,96 @@ def audio_async_render(audio: vs.AudioNode,
 
     :param progress:    String to use for render progress display.
                         If empty or ``None``, no progress display.
+    :param mmap:        Preallocate the output file and map its data chunk in memory.
+                        Frames are then requested out of order and written straight at their final offsets.
+                        ``outfile`` must be a seekable file opened from a path.
+    :param prefetch:    Number of frames requested in parallel when ``mmap`` is enabled.
+                        See :py:func:`request_frames`.
+    :param backlog:     Maximum number of requested frames not yet written when ``mmap`` is enabled.
+                        See :py:func:`request_frames`.
     """
     if progress:
-        p = get_render_progress()
+        p = RenderProgress()
         task = p.add_task(progress, total=audio.num_frames)
         p.start()
 
+    header_bytes, use_w64 = _wave_header(audio, header)
+    outfile.write(header_bytes)
+
+    if mmap:
+        for _ in _mmap_wave_data(audio, outfile, len(header_bytes), prefetch, backlog):
+            if progress:
+                p.update(task, advance=1)  # type: ignore[pylance-strict]
+    else:
+        interleaver = _PCMInterleaver(audio)
+        for f in audio.frames(close=True):
+            if progress:
+                p.update(task, advance=1)  # type: ignore[pylance-strict]
+            interleaver.write(f, outfile)
+    _patch_wave_size(outfile, use_w64)
+    if progress:
+        p.stop()  # type: ignore[pylance-strict]
+
+
+@logger.catch
+def audios_async_render(audios: Sequence[vs.AudioNode],  # noqa: C901
+                        outfiles: Sequence[BinaryIO],
+                        header: WaveHeader = WaveHeader.AUTO,
+                        progress: Optional[Sequence[str]] = None,
+                        prefetch: int = 0, backlog: int = -1) -> None:
+    """
+    Render several audio tracks in a single pass.
+    Frames of every AudioNode are requested concurrently and each track is written by its own writer.
+
+    :param audios:      Audio tracks to render.
+    :param outfiles:    Render output BinaryIO handles, one per track.
+    :param header:      Kind of Wave header. See :py:func:`audio_async_render`.
+    :param progress:    Strings to use for render progress display, one per track.
+                        Every track gets its own task in the same progress display.
+                        If empty or ``None``, no progress display.
+    :param prefetch:    Number of frames requested in parallel for each track. See :py:func:`request_frames`.
+    :param backlog:     Maximum number of requested frames not yet written for each track.
+                        See :py:func:`request_frames`.
+    """
+    if len(audios) != len(outfiles):
+        raise ValueError('audios_async_render: audios and outfiles must have the same length!')
+    if progress and len(progress) != len(audios):
+        raise ValueError('audios_async_render: audios and progress must have the same length!')
+
+    if progress:
+        p = RenderProgress()
+        tasks = [p.add_task(desc, total=audio.num_frames) for desc, audio in zip(progress, audios)]
+        p.start()
+
+    tracks: List[Tuple[int, Iterator[Tuple[int, vs.AudioFrame]], _PCMInterleaver, BinaryIO, bool]] = []
+    for i, (audio, outfile) in enumerate(zip(audios, outfiles)):
+        header_bytes, use_w64 = _wave_header(audio, header)
+        outfile.write(header_bytes)
+        frames = request_frames(audio, prefetch=prefetch, backlog=backlog)
+        tracks.append((i, frames, _PCMInterleaver(audio), outfile, use_w64))
+
+    try:
+        # Round-robin over the tracks; their requests stay in flight in the meantime
+        while tracks:
+            for track in list(tracks):
+                i, frames, interleaver, outfile, use_w64 = track
+                try:
+                    _, f = next(frames)
+                except StopIteration:
+                    _patch_wave_size(outfile, use_w64)
+                    tracks.remove(track)
+                    continue
+                interleaver.write(f, outfile)
+                if progress:
+                    p.update(tasks[i], advance=1)  # type: ignore[pylance-strict]
+    finally:
+        for track in tracks:
+            track[1].close()  # type: ignore[attr-defined]
+        if progress:
+            p.stop()  # type: ignore[pylance-strict]
+
+
+def _wave_header(audio: vs.AudioNode, header: WaveHeader) -> Tuple[bytes, bool]:
     bytes_per_output_sample = (audio.bits_per_sample + 7) // 8
     block_align = audio.num_channels * bytes_per_output_sample
     bytes_per_second = audio.sample_rate * block_align
@@ -230,12 +1111,10 @@ def audio_async_render(audio: vs.AudioNode,
         use_w64 = header
         header_func = (_wav_header, _w64_header)[header]
 
-    outfile.write(header_func(audio, bytes_per_second, block_align, data_size))
+    return header_func(audio, bytes_per_second, block_align, data_size), bool(use_w64)
 
-    for f in audio.frames(close=True):
-        if progress:
-            p.update(task, advance=1)  # type: ignore[pylance-strict]
-        _finish_frame_audio(f, outfile, audio.bits_per_sample == 24)
+
+def _patch_wave_size(outfile: BinaryIO, use_w64: bool) -> None:
     # Determine file size and place the value at the correct position
     # at the beginning of the file
     size = outfile.tell()
@@ -245,8 +1124,6 @@ def audio_async_render(audio: vs.AudioNode,
     else:
         outfile.seek(4)
         outfile.write(struct.pack('<I', size - 8))
-    if progress:
-        p.stop()  # type: ignore[pylance-strict]
 
 
 @logger.catch
@@ -311,26 +1188,178 @@ def _w64_header(audio: vs.AudioNode, bps: int, block_align: int, data_size: int)
     return header
 
 
-def _finish_frame_audio(frame: vs.AudioFrame, outfile: BinaryIO, _24bit: bool) -> None:
-    # For some reason f[i] is faster than list(f) or just passing f to stack
-    data = np.stack([frame[i] for i in range(frame.num_channels)], axis=1)  # type: ignore[var-annotated]
+class _PCMInterleaver:
+    """Interleaves the channels of audio frames into a reusable buffer"""
 
-    if _24bit:
-        if data.ndim == 1:
-            # Convert to a 2D array with a single column
-            data.shape += (1, )
-        # Data values are stored in 32 bits so we must convert them to 24 bits
-        # Then by shifting first 0 bits, then 8, then 16, the resulting output is 24 bit little-endian.
-        data = ((data // 2 ** 8).reshape(data.shape + (1, )) >> np.array([0, 8, 16], np.uint32))  # type: ignore[pylance-strict]
-        outfile.write(data.ravel().astype(np.uint8).tobytes())
+    def __init__(self, audio: vs.AudioNode) -> None:
+        self.num_channels = audio.num_channels
+        # Samples with 17 to 24 bits are stored left-justified in 32 bits
+        # and we only keep their three most significant bytes.
+        self.packed = (audio.bits_per_sample + 7) // 8 == 3
+        self.dtype: np.dtype[Any]
+        if audio.sample_type == vs.FLOAT:
+            self.dtype = np.dtype(np.float32)
+        else:
+            self.dtype = np.dtype(np.int16 if audio.bytes_per_sample == 2 else np.int32)
+        shape = (AUDIO_FRAME_SAMPLES, self.num_channels)
+        self.buffer: NDArray[Any] = np.empty(shape + (3, ), np.uint8) if self.packed else np.empty(shape, self.dtype)
+
+    def interleave(self, frame: vs.AudioFrame, out: Optional[NDArray[Any]] = None) -> NDArray[Any]:
+        """
+        Interleave the channels of the frame into ``out`` or into the internal buffer.
+        Every channel is copied in a single strided pass without any temporary array.
+
+        :return:    Array of shape (samples, channels) or (samples, channels, 3) for packed 24 bits.
+        """
+        num_samples = len(frame[0])
+        if out is None:
+            out = self.buffer[:num_samples]
+        for i in range(self.num_channels):
+            channel = np.frombuffer(frame[i], self.dtype)
+            if self.packed:
+                # Little-endian: the most significant bytes are the three last ones
+                out[:, i] = channel.view(np.uint8).reshape(num_samples, 4)[:, 1:]
+            else:
+                out[:, i] = channel
+        return out
+
+    def write(self, frame: vs.AudioFrame, outfile: BinaryIO) -> None:
+        outfile.write(self.interleave(frame).data)
+
+
+def _mmap_wave_data(audio: vs.AudioNode, outfile: BinaryIO, data_offset: int,
+                    prefetch: int, backlog: int) -> Iterator[vs.AudioFrame]:
+    # The header has been written so the file can be grown to its final size
+    # and its data chunk filled in any order through a shared mapping.
+    data_size = audio.num_samples * audio.num_channels * ((audio.bits_per_sample + 7) // 8)
+    if not isinstance(getattr(outfile, 'name', None), (str, bytes, os.PathLike)):
+        raise ValueError('audio_async_render: mmap requires an outfile opened from a path')
+    outfile.flush()
+    os.ftruncate(outfile.fileno(), data_offset + data_size)
+
+    interleaver = _PCMInterleaver(audio)
+    data = np.memmap(outfile.name, np.uint8, 'r+', data_offset, (data_size, ))
+    samples: NDArray[Any]
+    if interleaver.packed:
+        samples = data.reshape(audio.num_samples, audio.num_channels, 3)
     else:
-        outfile.write(data.ravel().view(np.int8).tobytes())
+        samples = data.view(interleaver.dtype).reshape(audio.num_samples, audio.num_channels)
+    try:
+        for n, f in request_frames(audio, prefetch=prefetch, backlog=backlog, ordered=False):
+            start = n * AUDIO_FRAME_SAMPLES
+            interleaver.interleave(f, samples[start:start + len(f[0])])
+            yield f
+        data.flush()
+    finally:
+        del samples, data
+
+    # Leave the file position where a streamed render would have left it
+    outfile.seek(data_offset + data_size)
 
 
 class SceneChangeMode(IntEnum):
     WWXD = 11
     SCXVID = 22
     MV = 44
+    SOURCE = 88
+
+
+# Detectors running between the source keyframes of the SOURCE modes
+_SOURCE_DETECTORS: Dict[int, int] = {
+    SceneChangeMode.SOURCE: 0,
+    SceneChangeMode.SOURCE | SceneChangeMode.WWXD: SceneChangeMode.WWXD,
+    SceneChangeMode.SOURCE | SceneChangeMode.SCXVID: SceneChangeMode.SCXVID,
+    SceneChangeMode.SOURCE | SceneChangeMode.MV: SceneChangeMode.MV,
+    SceneChangeMode.SOURCE | SceneChangeMode.WWXD | SceneChangeMode.SCXVID: SceneChangeMode.WWXD | SceneChangeMode.SCXVID,
+}
+
+
+class _SceneChangeDetector(NamedTuple):
+    modes: Tuple[SceneChangeMode, ...]
+    combine: np.ufunc
+
+    @property
+    def props(self) -> List[str]:
+        return list(dict.fromkeys(_SCENE_CHANGE_PROPS[m] for m in self.modes))
+
+    def __call__(self, f: vs.VideoFrame) -> bool:
+        return bool(self.combine.reduce([Properties.get_prop(f, _SCENE_CHANGE_PROPS[m], int) != 0 for m in self.modes]))
+
+    def columns(self, columns: Dict[str, NDArray[Any]]) -> NDArray[np.bool_]:
+        """Vectorised counterpart of __call__ over the columns of extract_props"""
+        return np.asarray(self.combine.reduce([columns[_SCENE_CHANGE_PROPS[m]] != 0 for m in self.modes]), np.bool_)
+
+
+_SCENE_CHANGE_PROPS = {
+    SceneChangeMode.WWXD: 'Scenechange',
+    SceneChangeMode.SCXVID: '_SceneChangePrev',
+    SceneChangeMode.MV: '_SceneChangePrev',
+}
+
+
+def _make_scene_change_detectors() -> Dict[int, _SceneChangeDetector]:
+    # A single detector, the union (OR) or the intersection (AND) of several ones
+    detectors: Dict[int, _SceneChangeDetector] = {}
+    for r in range(1, len(_SCENE_CHANGE_PROPS) + 1):
+        for modes in combinations(_SCENE_CHANGE_PROPS, r):
+            detectors[reduce(or_, modes)] = _SceneChangeDetector(modes, np.logical_or)
+            if r > 1:
+                detectors[reduce(and_, modes)] = _SceneChangeDetector(modes, np.logical_and)
+    return detectors
+
+
+_SCENE_CHANGE_DETECTORS = _make_scene_change_detectors()
+
+
+def _scene_change_detector(mode: int | SceneChangeMode) -> _SceneChangeDetector:
+    try:
+        return _SCENE_CHANGE_DETECTORS[int(mode)]
+    except KeyError:
+        raise ValueError(f'find_scene_changes: unsupported scene change mode {int(mode)}!') from None
+
+
+class SceneChangeProxy(NamedTuple):
+    """Clip the scene change detectors run on"""
+
+    width: int = 640
+    """Width of the proxy"""
+
+    height: int = 360
+    """Height of the proxy"""
+
+    kernel: str = 'Bilinear'
+    """Name of the resize kernel, e.g. ``Point``, ``Bilinear`` or ``Bicubic``"""
+
+    gray: bool = False
+    """Only resize the luma and use blank chroma planes"""
+
+    half_rate: bool = False
+    """
+    Detect on every other frame first,
+    then run the detectors at full rate around the candidates only
+    """
+
+    refine_radius: int = 4
+    """Number of frames rendered before every refinement window of the half rate mode to warm up the detectors"""
+
+
+class SceneChangeBenchmark(NamedTuple):
+    """Result of a scene change proxy benchmark"""
+
+    proxy: SceneChangeProxy
+    """Benchmarked proxy"""
+
+    elapsed: float
+    """Detection time in seconds"""
+
+    frames: List[int]
+    """Detected scene changes"""
+
+    missed: List[int]
+    """Scene changes of the reference that weren't detected"""
+
+    extra: List[int]
+    """Detected scene changes that aren't in the reference"""
 
 
 def find_scene_changes(  # noqa: C901
@@ -338,6 +1367,10 @@ def find_scene_changes(  # noqa: C901
     scxvid_use_slices: bool = False,
     mv_vectors: Optional[vs.VideoNode] = None,
     mv_thscd1: Optional[int] = None, mv_thscd2: Optional[int] = None,
+    proxy: Optional[SceneChangeProxy] = None,
+    segments: int = 1, overlap: int = 32,
+    source_keyframes: Optional[Sequence[int]] = None, source_gap: int = 240,
+    display: Optional[RenderProgress] = None
 ) -> List[int]:
     """
     Generate a list of scene changes (keyframes).
@@ -354,48 +1387,608 @@ def find_scene_changes(  # noqa: C901
                    * SCXVID: Use scxvid
                    * WWXD_SCXVID_UNION: Union of wwxd and sxcvid (must be detected by at least one)
                    * WWXD_SCXVID_INTERSECTION: Intersection of wwxd and scxvid (must be detected by both)
+                   * SOURCE: Use ``source_keyframes`` without decoding the clip
+                   * SOURCE_WWXD, SOURCE_SCXVID, SOURCE_MV, SOURCE_WWXD_SCXVID_UNION:
+                     Use ``source_keyframes`` and run the detector on the long gaps between them
+
+    :param proxy:       Clip the detectors run on. Defaults to a 640x360 YUV420P8 Bilinear resize.
+    :param segments:    Split the clip into this many ranges detected concurrently.
+                        Every range gets its own filter instances so stateful detectors
+                        like SCXVID don't serialise the whole render.
+    :param overlap:     Number of frames rendered before every range but the first one
+                        to warm up the detectors. Their results are discarded.
+                        Must be at least 1 with several segments since the detectors
+                        flag the first frame they see as a scene change.
+    :param source_keyframes:    Keyframes of the source bitstream, e.g. from
+                                :py:func:`vardautomation.tooling.misc.get_source_keyframes`.
+                                Required by the SOURCE modes.
+    :param source_gap:          Minimum distance between two source keyframes
+                                for the frames between them to be checked by the detector.
+    :param display:             Progress display the detection tasks are added to,
+                                e.g. to share one display across several calls. Defaults to a new display.
 
     :return:       List of scene changes.
     """
+    proxy = proxy or SceneChangeProxy()
+    _check_overlap(segments, overlap)
+    if mode in _SOURCE_DETECTORS:
+        return _detect_source_gaps(
+            clip, mode, proxy, mv_vectors, source_keyframes, source_gap,
+            lambda gaps, detector, gaps_proxy: find_scene_changes(
+                gaps, detector,
+                scxvid_use_slices=scxvid_use_slices, mv_thscd1=mv_thscd1, mv_thscd2=mv_thscd2,
+                proxy=gaps_proxy, segments=segments, overlap=overlap, display=display
+            )
+        )
+
+    if proxy.half_rate:
+        windows = _DetectionWindows.half_rate(clip, proxy, mv_vectors, find_scene_changes(
+            clip.std.SelectEvery(2, 0), mode,
+            scxvid_use_slices=scxvid_use_slices, mv_thscd1=mv_thscd1, mv_thscd2=mv_thscd2,
+            proxy=proxy._replace(half_rate=False), segments=segments, overlap=max(1, overlap // 2),
+            display=display
+        ))
+        if not windows.keep:
+            return []
+        return windows.refine(find_scene_changes(
+            windows.splice(), mode,
+            scxvid_use_slices=scxvid_use_slices, mv_thscd1=mv_thscd1, mv_thscd2=mv_thscd2,
+            proxy=windows.proxy, display=display
+        ))
+
+    if segments > 1:
+        return _find_scene_changes_segmented(
+            clip, mode, proxy, segments, overlap, scxvid_use_slices, mv_vectors, mv_thscd1, mv_thscd2, display
+        )
+
+    clip, detector = _scene_change_clip(clip, mode, proxy, scxvid_use_slices, mv_vectors, mv_thscd1, mv_thscd2)
+    if not detector.modes:
+        return []
+    columns = extract_props(clip, detector.props, progress="Detecting scene changes...", display=display)
+
+    return np.flatnonzero(detector.columns(columns)).tolist()
+
+
+def _check_overlap(segments: int, overlap: int) -> None:
+    # The first frame seen by WWXD and SCXVID is always a scene change, so it must be a warm-up frame
+    if segments > 1 and overlap < 1:
+        raise ValueError('find_scene_changes: overlap must be at least 1 with several segments!')
+
+
+def _source_keyframes(mode: int, source_keyframes: Optional[Sequence[int]]) -> List[int]:
+    if source_keyframes is None:
+        raise ValueError(f'find_scene_changes: source_keyframes is needed by mode {mode}!')
+    return sorted(set(source_keyframes))
+
+
+def _detect_source_gaps(
+    clip: vs.VideoNode, mode: int, proxy: SceneChangeProxy, mv_vectors: Optional[vs.VideoNode],
+    source_keyframes: Optional[Sequence[int]], source_gap: int,
+    detect: Callable[[vs.VideoNode, int, SceneChangeProxy], List[int]]
+) -> List[int]:
+    # Merge the source keyframes with what ``detect`` finds in the splice of the long gaps between them
+    keyframes = _source_keyframes(mode, source_keyframes)
+    if not _SOURCE_DETECTORS[mode]:
+        return keyframes
+    windows = _DetectionWindows.source_gaps(clip, proxy, mv_vectors, keyframes, source_gap)
+    if not windows.keep:
+        return keyframes
+    return sorted(set(keyframes).union(windows.refine(detect(windows.splice(), _SOURCE_DETECTORS[mode], windows.proxy))))
+
+
+def _find_scene_changes_segmented(
+    clip: vs.VideoNode, mode: int | SceneChangeMode, proxy: SceneChangeProxy, segments: int, overlap: int,
+    scxvid_use_slices: bool, mv_vectors: Optional[vs.VideoNode],
+    mv_thscd1: Optional[int], mv_thscd2: Optional[int], display: Optional[RenderProgress]
+) -> List[int]:
+    segments = min(segments, clip.num_frames)
+    bounds = [clip.num_frames * i // segments for i in range(segments + 1)]
+    prefetch = max(2, vs.core.num_threads // segments)
+
+    ranges: List[Tuple[int, int, Iterator[Tuple[int, vs.VideoFrame]], _SceneChangeDetector]] = []
+    total = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        first = start - min(overlap, start)
+        total += end - first
+        seg, is_scene_change = _scene_change_clip(
+            clip[first:end], mode, proxy, scxvid_use_slices,
+            mv_vectors[first:end] if mv_vectors else None, mv_thscd1, mv_thscd2
+        )
+        ranges.append((first, start - first, request_frames(seg, prefetch=prefetch), is_scene_change))
+
     frames: List[int] = []
-    props: List[str] = []
-    clip = clip.resize.Bilinear(640, 360, format=vs.YUV420P8)
-    SCM = SceneChangeMode
-    wwxd_unions = {SCM.WWXD | SCM.SCXVID, SCM.WWXD | SCM.MV, SCM.WWXD | SCM.SCXVID | SCM.MV}
-    wwxd_inters = {SCM.WWXD & SCM.SCXVID, SCM.WWXD & SCM.MV, SCM.WWXD & SCM.SCXVID & SCM.MV}
-    scxvid_unions = {SCM.SCXVID | SCM.WWXD, SCM.SCXVID | SCM.MV, SCM.SCXVID | SCM.WWXD | SCM.MV}
-    scxvid_inters = {SCM.SCXVID & SCM.WWXD, SCM.SCXVID & SCM.MV, SCM.SCXVID & SCM.WWXD & SCM.MV}
-    mv_unions = {SCM.MV | SCM.WWXD, SCM.MV | SCM.SCXVID, SCM.MV | SCM.WWXD | SCM.SCXVID}
-    mv_inters = {SCM.MV & SCM.WWXD, SCM.MV & SCM.SCXVID, SCM.MV & SCM.WWXD & SCM.SCXVID}
+    try:
+        with _progress_task("Detecting scene changes...", total, display) as advance:
+            # Round-robin over the ranges; their requests stay in flight in the meantime
+            while ranges:
+                for rng in list(ranges):
+                    first, warmup, seg_frames, is_scene_change = rng
+                    try:
+                        n, f = next(seg_frames)
+                    except StopIteration:
+                        ranges.remove(rng)
+                        continue
+                    if n >= warmup and is_scene_change(f):
+                        frames.append(first + n)
+                    advance(1)
+    finally:
+        for rng in ranges:
+            rng[2].close()  # type: ignore[attr-defined]
+
+    # Ranges don't overlap once the warm-up frames are dropped
+    return sorted(set(frames))
+
+
+class _DetectionWindows:
+    """Ranges of a clip the scene change detectors only run on"""
+
+    def __init__(self, clip: vs.VideoNode, proxy: SceneChangeProxy, mv_vectors: Optional[vs.VideoNode]) -> None:
+        if proxy.refine_radius < 1:
+            raise ValueError('find_scene_changes: refine_radius must be at least 1!')
+        if mv_vectors:
+            raise ValueError('find_scene_changes: mv_vectors can\'t be used in half rate and source modes!')
+        self.source = clip
+        self.proxy = proxy._replace(half_rate=False)
+        self.keep: List[Tuple[int, int]] = []
+        self.frames: List[int] = []
+
+    def add(self, start: int, end: int) -> None:
+        """Add a range of frames to detect on"""
+        start, end = max(0, start), min(self.source.num_frames, end)
+        if start < end:
+            self.keep.append((start, end))
+
+    def splice(self) -> vs.VideoNode:
+        """Splice the ranges, each one preceded by ``refine_radius`` warm-up frames"""
+        ranges: List[List[int]] = []
+        for start, end in sorted(self.keep):
+            start = max(0, start - self.proxy.refine_radius)
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(end, ranges[-1][1])
+            else:
+                ranges.append([start, end])
+        self.frames = [n for start, end in ranges for n in range(start, end)]
+        return vs.core.std.Splice([self.source[start:end] for start, end in ranges])
+
+    def refine(self, found: Iterable[int]) -> List[int]:
+        """Map the scene changes found in the splice back to the source"""
+        keep = {n for start, end in self.keep for n in range(start, end)}
+        return sorted(self.frames[i] for i in found if self.frames[i] in keep)
+
+    @classmethod
+    def half_rate(cls, clip: vs.VideoNode, proxy: SceneChangeProxy, mv_vectors: Optional[vs.VideoNode],
+                  candidates: Iterable[int]) -> '_DetectionWindows':
+        windows = cls(clip, proxy, mv_vectors)
+        # A cut detected at k in the half rate clip is either on 2k - 1 or 2k
+        for k in candidates:
+            windows.add(2 * k - 1, 2 * k + 1)
+        return windows
+
+    @classmethod
+    def source_gaps(cls, clip: vs.VideoNode, proxy: SceneChangeProxy, mv_vectors: Optional[vs.VideoNode],
+                    keyframes: Sequence[int], gap: int) -> '_DetectionWindows':
+        windows = cls(clip, proxy, mv_vectors)
+        for start, end in zip(keyframes, [*keyframes[1:], clip.num_frames]):
+            if end - start > gap:
+                windows.add(start + 1, end)
+        return windows
+
+
+def benchmark_scene_change_proxies(
+    clip: vs.VideoNode, proxies: Sequence[SceneChangeProxy],
+    mode: int | SceneChangeMode = SceneChangeMode.WWXD,
+    reference: SceneChangeProxy = SceneChangeProxy(), **kwargs: Any
+) -> List[SceneChangeBenchmark]:
+    """
+    Compare the speed and the accuracy of scene change proxies against a reference proxy.
+
+    :param clip:        Clip to search for scene changes. Will be rendered once per proxy.
+    :param proxies:     Proxies to benchmark.
+    :param mode:        Scene change detection mode.
+    :param reference:   Proxy giving the expected scene changes. Defaults to the default proxy.
+    :param kwargs:      Additional arguments passed to :py:func:`find_scene_changes`.
+
+    :return:            Benchmark of the reference followed by the ones of ``proxies``.
+    """
+    results: List[SceneChangeBenchmark] = []
+    expected: Optional[Set[int]] = None
+    for proxy in [reference, *proxies]:
+        start = time.perf_counter()
+        frames = find_scene_changes(clip, mode, proxy=proxy, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        found = set(frames)
+        if expected is None:
+            expected = found
+        results.append(SceneChangeBenchmark(proxy, elapsed, frames, sorted(expected - found), sorted(found - expected)))
+
+    for res in results:
+        logger.info(
+            f'{res.proxy}: {res.elapsed:.02f} s ({clip.num_frames / res.elapsed:.02f} fps), '
+            f'{len(res.frames)} scene changes, {len(res.missed)} missed, {len(res.extra)} extra'
+        )
+    return results
+
+
+def _scene_change_clip(
+    clip: vs.VideoNode, mode: int | SceneChangeMode, proxy: SceneChangeProxy,
+    scxvid_use_slices: bool, mv_vectors: Optional[vs.VideoNode],
+    mv_thscd1: Optional[int], mv_thscd2: Optional[int]
+) -> Tuple[vs.VideoNode, _SceneChangeDetector]:
+    resizer = getattr(clip.resize, proxy.kernel)
+    if proxy.gray:
+        # The detectors only look at the luma but SCXVID wants a YUV420P8 clip
+        luma = resizer(proxy.width, proxy.height, format=vs.GRAY8)
+        blank = vs.core.std.BlankClip(luma, format=vs.YUV420P8, color=[0, 128, 128], keep=True)
+        clip = vs.core.std.ShufflePlanes([luma, blank, blank], [0, 1, 2], vs.YUV)
+    else:
+        clip = resizer(proxy.width, proxy.height, format=vs.YUV420P8)
+    detector = _scene_change_detector(mode)
 
     # SCXVID and mv share the same prop
     # https://github.com/dubhater/vapoursynth-scxvid/issues/3
-    if mode in {SCM.WWXD} | wwxd_unions | wwxd_inters:
+    if SceneChangeMode.WWXD in detector.modes:
         clip = clip.wwxd.WWXD()
-        props.append('Scenechange')
-    if mode in {SCM.SCXVID} | scxvid_unions | scxvid_inters:
+    if SceneChangeMode.SCXVID in detector.modes:
         clip = clip.scxvid.Scxvid(use_slices=scxvid_use_slices)
-        props.append('_SceneChangePrev')
-    if mode in {SCM.MV} | mv_unions | mv_inters:
+    if SceneChangeMode.MV in detector.modes:
         if not mv_vectors:
             mv_vectors = clip.mv.Super().mv.Analyse()
         clip = clip.mv.SCDetection(mv_vectors, mv_thscd1, mv_thscd2)
-        props.append('_SceneChangePrev')
-
-    def _cb(n: int, f: vs.VideoFrame) -> None:
-        match mode:
-            case SCM.WWXD | SCM.SCXVID | SCM.MV:
-                if Properties.get_prop(f, props[0], int):
-                    frames.append(n)
-            case _ if mode in wwxd_unions | scxvid_unions | mv_unions:
-                if any(Properties.get_prop(f, p, int) for p in props):
-                    frames.append(n)
-            case _ if mode in wwxd_inters | scxvid_inters | mv_inters:
-                if all(Properties.get_prop(f, p, int) for p in props):
-                    frames.append(n)
-            case _:
+
+    return clip, detector
+
+
+class SceneChangeSink(RenderSink):
+    """
+    Detects scene changes during a :py:func:`tee_render`.
+
+    The clip given to :py:func:`tee_render` must be the one returned by :py:meth:`attach`.
+    """
+
+    frames: List[int]
+    """Detected scene changes"""
+
+    def __init__(self, mode: int | SceneChangeMode = SceneChangeMode.WWXD, *,
+                 proxy: Optional[SceneChangeProxy] = None, scxvid_use_slices: bool = False,
+                 mv_thscd1: Optional[int] = None, mv_thscd2: Optional[int] = None) -> None:
+        """
+        :param mode:                Scene change detection mode. See :py:func:`find_scene_changes`.
+                                    The SOURCE modes aren't supported.
+        :param proxy:               Clip the detectors run on. The half rate mode isn't supported.
+        :param scxvid_use_slices:   See :py:func:`find_scene_changes`.
+        :param mv_thscd1:           See :py:func:`find_scene_changes`.
+        :param mv_thscd2:           See :py:func:`find_scene_changes`.
+        """
+        self.mode = mode
+        self.proxy = proxy or SceneChangeProxy()
+        if mode in _SOURCE_DETECTORS or self.proxy.half_rate:
+            raise ValueError(f'{self.__class__.__name__}: SOURCE modes and half rate proxies aren\'t supported!')
+        self.scxvid_use_slices = scxvid_use_slices
+        self.mv_thscd1, self.mv_thscd2 = mv_thscd1, mv_thscd2
+        self.frames = []
+        self._detector: Optional[_SceneChangeDetector] = None
+
+    def attach(self, clip: vs.VideoNode, detection_clip: Optional[vs.VideoNode] = None) -> vs.VideoNode:
+        """
+        Copy the props of the scene change detectors to the clip to render
+
+        :param clip:            Clip to render
+        :param detection_clip:  Clip to search for scene changes, e.g. a ``qpfile_clip``. Defaults to ``clip``
+        :return:                ``clip`` with the detector props
+        """
+        detection_clip = detection_clip or clip
+        if detection_clip.num_frames != clip.num_frames:
+            raise ValueError(f'{self.__class__.__name__}: the detection clip should have the same length than the clip')
+        detected, self._detector = _scene_change_clip(
+            detection_clip, self.mode, self.proxy, self.scxvid_use_slices, None, self.mv_thscd1, self.mv_thscd2
+        )
+        if not self._detector.modes:
+            return clip
+        return clip.std.CopyFrameProps(detected, props=self._detector.props)
+
+    def start(self, clip: vs.VideoNode) -> None:
+        if self._detector is None:
+            raise ValueError(f'{self.__class__.__name__}: attach must be called on the rendered clip first!')
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        assert self._detector
+        if self._detector.modes and self._detector(frame):
+            self.frames.append(n)
+
+
+class _AioFrameRequester:
+    """asyncio counterpart of _FrameRequester"""
+
+    def __init__(self, node: vs.VideoNode | vs.AudioNode, prefetch: int, backlog: int,
+                 stats: Optional[RenderStats] = None) -> None:
+        self.node = node
+        self.stats = stats
+        # Request times, then latencies once done
+        self.times: Dict[int, float] = {}
+        self.numbers = iter(range(node.num_frames))
+        self.prefetch, self.backlog = _normalise_prefetch(prefetch, backlog)
+        self.loop = asyncio.get_running_loop()
+        # Frames requested but not consumed yet, in request order
+        self.pending: Deque[Tuple[int, asyncio.Future[vs.RawFrame]]] = deque()
+        self.in_flight = 0
+
+    def fill(self) -> None:
+        while self.in_flight < self.prefetch and len(self.pending) < self.backlog:
+            try:
+                n = next(self.numbers)
+            except StopIteration:
+                return
+            fut = self.loop.create_future()
+            self.pending.append((n, fut))
+            self.in_flight += 1
+            if self.stats:
+                self.times[n] = time.perf_counter()
+            self.node.get_frame_async(n, partial(self._on_done, n, fut))
+
+    def _on_done(self, n: int, fut: asyncio.Future[vs.RawFrame],
+                 frame: Optional[vs.RawFrame], error: Optional[Exception]) -> None:
+        # Called from a VapourSynth thread
+        if self.stats:
+            self.times[n] = time.perf_counter() - self.times[n]
+        try:
+            self.loop.call_soon_threadsafe(self._set, fut, frame, error)
+        except RuntimeError:
+            # The event loop is closed
+            if frame is not None:
+                frame.close()
+
+    def _set(self, fut: asyncio.Future[vs.RawFrame], frame: Optional[vs.RawFrame], error: Optional[Exception]) -> None:
+        self.in_flight -= 1
+        if fut.cancelled():
+            if frame is not None:
+                frame.close()
+        elif frame is not None:
+            fut.set_result(frame)
+        else:
+            fut.set_exception(error or vs.Error('Failed to get a frame'))
+        self.fill()
+
+    def stop(self) -> None:
+        self.numbers = iter(())
+        for _, fut in self.pending:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                fut.result().close()
+            else:
+                fut.cancel()
+
+    async def run(self) -> AsyncGenerator[Tuple[int, vs.RawFrame], None]:
+        stats = self.stats
+        try:
+            if stats:
+                stats.start()
+            self.fill()
+            while self.pending:
+                n, fut = self.pending[0]
+                t0 = time.perf_counter() if stats else 0.0
+                frame = await fut
+                t1 = time.perf_counter() if stats else 0.0
+                self.pending.popleft()
+                self.fill()
+                try:
+                    yield n, frame
+                finally:
+                    frame.close()
+                if stats:
+                    stats.record(self.times.pop(n), self.in_flight, t1 - t0, time.perf_counter() - t1)
+        finally:
+            self.stop()
+
+
+async def _to_thread_uncancellable(func: Callable[..., Any], *args: Any) -> None:
+    # A thread can't be interrupted: on cancellation, wait for it to be done with its arguments
+    # before the cancellation closes the frames it is reading
+    task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        await asyncio.shield(task)
+    except asyncio.CancelledError:
+        while not task.done():
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
                 pass
+        if not task.cancelled():
+            task.exception()
+        raise
+
+
+@overload
+def _aio_request_frames(node: vs.VideoNode, prefetch: int = ..., backlog: int = ...,
+                        stats: Optional[RenderStats] = ...) -> AsyncGenerator[Tuple[int, vs.VideoFrame], None]:
+    ...
+
+
+@overload
+def _aio_request_frames(node: vs.AudioNode, prefetch: int = ..., backlog: int = ...,
+                        stats: Optional[RenderStats] = ...) -> AsyncGenerator[Tuple[int, vs.AudioFrame], None]:
+    ...
+
+
+def _aio_request_frames(node: vs.VideoNode | vs.AudioNode, prefetch: int = 0, backlog: int = -1,
+                        stats: Optional[RenderStats] = None) -> AsyncGenerator[Tuple[int, vs.RawFrame], None]:
+    return _AioFrameRequester(node, prefetch, backlog, stats).run()
+
+
+async def clip_render_aio(clip: vs.VideoNode,  # noqa: C901
+                          outfile: BinaryIO | asyncio.StreamWriter | None = None,
+                          timecodes: TextIO | None = None,
+                          progress: Optional[str] = None,
+                          callback: RenderCallback | List[RenderCallback] | None = None,
+                          coalesce_size: int = 1 << 20,
+                          prefetch: int = 0, backlog: int = -1,
+                          stats: Optional[RenderStats] = None) -> None | List[float]:
+    """
+    asyncio counterpart of :py:func:`clip_async_render`.
+
+    Frames are awaited instead of blocking the current thread, so a single event loop can drive
+    several renders and subprocesses at the same time.
+    Cancelling the task stops requesting frames and closes every frame already requested.
+
+    :param clip:            Clip to render.
+    :param outfile:         Y4MPEG render output BinaryIO handle or ``asyncio.StreamWriter``,
+                            eg. the stdin of a process made by ``asyncio.create_subprocess_exec``.
+                            If None, no Y4M output is performed. (Default: None)
+    :param timecodes:       Timecode v2 file TextIO handle. If None, timecodes will not be written.
+    :param progress:        String to use for render progress display.
+                            If empty or ``None``, no progress display.
+                            Only one progress display can be active at a time. (Default: None)
+    :param callback:        Single or list of callbacks to be preformed. The callbacks are called
+                            when each sequential frame is output, not when each frame is done.
+    :param coalesce_size:   Size in bytes of the buffer grouping small frames in one write.
+                            See :py:class:`Y4MWriter`. (Default: 1 MiB)
+    :param prefetch:        Max number of concurrent rendered frames.
+                            Defaults to ``core.num_threads`` like in ``VideoNode.output``.
+    :param backlog:         How many unconsumed frames (including those that did not finish rendering yet)
+                            are buffered at most before no additional frame is requested.
+                            Defaults to ``prefetch * 3`` like in ``VideoNode.output``.
+    :param stats:           If specified, per-frame timings are recorded into it and reported at the end.
+
+    :return:                List of timecodes from rendered clip.
+    """
+    cbl = [] if callback is None else callback if isinstance(callback, list) else [callback]
+
+    if progress:
+        p = RenderProgress()
+        task = p.add_task(progress, total=clip.num_frames)
+        p.start()
+
+        def _progress_cb(n: int, f: vs.VideoFrame) -> None:
+            p.update(task, advance=1)
+
+        cbl.append(_progress_cb)
+
+    writer: Optional[Y4MWriter] = None
+    if isinstance(outfile, asyncio.StreamWriter):
+        outfile.write(_y4m_header(clip))
+    elif outfile:
+        writer = Y4MWriter(outfile, coalesce_size)
+        writer.write_header(clip)
+
+    tcs = Timecodes()
+
+    try:
+        async with aclosing(_aio_request_frames(clip, prefetch, backlog, stats)) as frames:
+            async for n, f in frames:
+                for cb in cbl:
+                    cb(n, f)
+                if timecodes:
+                    tcs.append_frame(f)
+                if writer:
+                    # Writing to a pipe can block so let a thread do it
+                    await _to_thread_uncancellable(writer.write_frame, f)
+                elif isinstance(outfile, asyncio.StreamWriter):
+                    outfile.write(Y4M_FRAME_HEADER)
+                    for chunk in f.readchunks():
+                        outfile.write(chunk.cast('B'))
+                    await outfile.drain()
+    finally:
+        if writer:
+            writer.flush()
+        if progress:
+            p.stop()  # type: ignore[pylance]
+
+    if stats:
+        stats.report()
+    if timecodes:
+        tcs.write_v2(timecodes)
+        return tcs.seconds()
+    return None
+
+
+async def audio_render_aio(audio: vs.AudioNode,
+                           outfile: BinaryIO,
+                           header: WaveHeader = WaveHeader.AUTO,
+                           progress: Optional[str] = None,
+                           prefetch: int = 0, backlog: int = -1) -> None:
+    """
+    asyncio counterpart of :py:func:`audio_async_render`.
+
+    Cancelling the task stops requesting frames and closes every frame already requested.
+    The Wave header is left unpatched in that case.
+
+    :param audio:       Audio to render.
+    :param outfile:     Render output BinaryIO handle.
+    :param header:      Kind of Wave header. See :py:func:`audio_async_render`.
+    :param progress:    String to use for render progress display.
+                        If empty or ``None``, no progress display.
+                        Only one progress display can be active at a time. (Default: None)
+    :param prefetch:    Max number of concurrent rendered frames.
+                        Defaults to ``core.num_threads`` like in ``VideoNode.output``.
+    :param backlog:     How many unconsumed frames (including those that did not finish rendering yet)
+                        are buffered at most before no additional frame is requested.
+                        Defaults to ``prefetch * 3`` like in ``VideoNode.output``.
+    """
+    if progress:
+        p = RenderProgress()
+        task = p.add_task(progress, total=audio.num_frames)
+        p.start()
+
+    header_bytes, use_w64 = _wave_header(audio, header)
+    outfile.write(header_bytes)
+
+    interleaver = _PCMInterleaver(audio)
+    try:
+        async with aclosing(_aio_request_frames(audio, prefetch, backlog)) as frames:
+            async for _, f in frames:
+                if progress:
+                    p.update(task, advance=1)  # type: ignore[pylance-strict]
+                await _to_thread_uncancellable(interleaver.write, f, outfile)
+        _patch_wave_size(outfile, use_w64)
+    finally:
+        if progress:
+            p.stop()  # type: ignore[pylance-strict]
 
-    clip_async_render(clip, progress="Detecting scene changes...", callback=_cb)
 
-    return sorted(frames)
+async def find_scene_changes_aio(
+    clip: vs.VideoNode, mode: int | SceneChangeMode = SceneChangeMode.WWXD, *,
+    scxvid_use_slices: bool = False,
+    mv_vectors: Optional[vs.VideoNode] = None,
+    mv_thscd1: Optional[int] = None, mv_thscd2: Optional[int] = None,
+    proxy: Optional[SceneChangeProxy] = None,
+    source_keyframes: Optional[Sequence[int]] = None, source_gap: int = 240,
+    prefetch: int = 0, backlog: int = -1
+) -> List[int]:
+    """
+    asyncio counterpart of :py:func:`find_scene_changes`.
+    Parameters are the same, with the addition of ``prefetch`` and ``backlog``
+    (see :py:func:`request_frames`) and without the segmented mode.
+
+    :return:       List of scene changes.
+    """
+    proxy = proxy or SceneChangeProxy()
+    find = partial(
+        find_scene_changes_aio,
+        scxvid_use_slices=scxvid_use_slices, mv_thscd1=mv_thscd1, mv_thscd2=mv_thscd2,
+        proxy=proxy._replace(half_rate=False), prefetch=prefetch, backlog=backlog
+    )
+    if mode in _SOURCE_DETECTORS:
+        keyframes = _source_keyframes(mode, source_keyframes)
+        if not _SOURCE_DETECTORS[mode]:
+            return keyframes
+        windows = _DetectionWindows.source_gaps(clip, proxy, mv_vectors, keyframes, source_gap)
+        if not windows.keep:
+            return keyframes
+        return sorted(set(keyframes).union(windows.refine(await find(windows.splice(), _SOURCE_DETECTORS[mode]))))
+
+    if proxy.half_rate:
+        windows = _DetectionWindows.half_rate(clip, proxy, mv_vectors, await find(clip.std.SelectEvery(2, 0), mode))
+        if not windows.keep:
+            return []
+        return windows.refine(await find(windows.splice(), mode))
+
+    clip, detector = _scene_change_clip(clip, mode, proxy, scxvid_use_slices, mv_vectors, mv_thscd1, mv_thscd2)
+    if not detector.modes:
+        return []
+
+    # Same columns as extract_props in find_scene_changes
+    rows: Dict[str, List[Any]] = {k: [] for k in detector.props}
+    async with aclosing(_aio_request_frames(clip, prefetch, backlog)) as it:
+        async for _, f in it:
+            _append_props(f, rows, None)
+
+    return np.flatnonzero(detector.columns(_props_columns(rows, {}))).tolist()
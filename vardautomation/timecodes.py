@@ -0,0 +1,166 @@
+"""Timecodes module"""
+
+__all__ = ['Timecodes']
+
+import math
+import os
+
+from array import array
+from fractions import Fraction
+from typing import Any, Iterable, List, TextIO, Tuple
+
+import numpy as np
+import vapoursynth as vs
+
+from numpy.typing import ArrayLike, NDArray
+
+from .utils import Properties
+from .vpathlib import VPath
+from .vtypes import AnyPath
+
+
+class Timecodes:
+    """
+    Frame timestamps computed from integer frame durations.
+
+    Durations are stored as ``num / den`` seconds, like the ``_DurationNum`` and ``_DurationDen`` frame props.
+    Timestamps are accumulated exactly with integer arithmetic on the least common multiple
+    of the denominators so they never drift, whatever the number of frames.
+    """
+
+    def __init__(self) -> None:
+        self._num = array('q')
+        self._den = array('q')
+
+    def __len__(self) -> int:
+        return len(self._num)
+
+    @classmethod
+    def from_clips(cls, clips: Iterable[vs.VideoNode]) -> 'Timecodes':
+        """
+        Make the timecodes of constant frame rate clips put end to end
+
+        :param clips:       Source clips
+        :return:            Timecodes object
+        """
+        tcs = cls()
+        for clip in clips:
+            tcs.extend_cfr(clip.num_frames, clip.fps)
+        return tcs
+
+    def append(self, num: int, den: int) -> None:
+        """
+        Add a frame
+
+        :param num:         Duration numerator
+        :param den:         Duration denominator
+        """
+        self._num.append(num)
+        self._den.append(den)
+
+    def append_frame(self, frame: vs.VideoFrame) -> None:
+        """
+        Add a frame using its ``_DurationNum`` and ``_DurationDen`` props
+
+        :param frame:       Rendered frame
+        """
+        self.append(Properties.get_prop(frame, '_DurationNum', int), Properties.get_prop(frame, '_DurationDen', int))
+
+    def extend(self, num: ArrayLike, den: ArrayLike) -> None:
+        """
+        Add several frames
+
+        :param num:         Duration numerators, e.g. a ``_DurationNum`` column of :py:func:`extract_props`
+        :param den:         Duration denominators, e.g. a ``_DurationDen`` column of :py:func:`extract_props`
+        """
+        anum, aden = np.broadcast_arrays(np.asarray(num, np.int64), np.asarray(den, np.int64))
+        self._num.frombytes(np.ascontiguousarray(anum).tobytes())
+        self._den.frombytes(np.ascontiguousarray(aden).tobytes())
+
+    def extend_cfr(self, num_frames: int, fps: Fraction) -> None:
+        """
+        Add frames of a constant frame rate
+
+        :param num_frames:  Number of frames
+        :param fps:         Frame rate
+        """
+        self.extend(np.full(num_frames, fps.denominator, np.int64), np.full(num_frames, fps.numerator, np.int64))
+
+    def durations(self) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """
+        :return:            Reduced numerators and denominators of the frame durations
+        """
+        num = np.frombuffer(self._num, np.int64) if self._num else np.zeros(0, np.int64)
+        den = np.frombuffer(self._den, np.int64) if self._den else np.ones(0, np.int64)
+        gcd = np.gcd(num, den)
+        gcd[gcd == 0] = 1
+        return num // gcd, den // gcd
+
+    def ticks(self) -> Tuple[NDArray[Any], int]:
+        """
+        Exact start time of every frame and end time of the last frame
+
+        :return:            Cumulative times in units of ``1 / timescale`` seconds and the timescale
+        """
+        num, den = self.durations()
+        if not len(num):
+            return np.zeros(1, np.int64), 1
+        timescale = math.lcm(*np.unique(den).tolist())
+        # Use Python integers if int64 could overflow
+        dtype: Any = np.int64 if int(num.max()) * timescale * (len(num) + 1) * 2000 < 2 ** 63 else object
+        ticks = np.asarray(num, dtype) * (timescale // np.asarray(den, dtype))
+        return np.concatenate([np.zeros(1, dtype), np.cumsum(ticks, dtype=dtype)]), timescale
+
+    def timestamps(self, unit: int = 1000) -> NDArray[Any]:
+        """
+        :param unit:        Number of timestamp units per second, defaults to milliseconds
+        :return:            Start time of every frame and end time of the last frame, rounded to the nearest unit
+        """
+        ticks, timescale = self.ticks()
+        return (2 * ticks * unit + timescale) // (2 * timescale)
+
+    def seconds(self) -> List[float]:
+        """
+        :return:            Start time of every frame and end time of the last frame in seconds
+        """
+        ticks, timescale = self.ticks()
+        return [t / timescale for t in ticks.tolist()]
+
+    def write_v2(self, outfile: AnyPath | TextIO) -> None:
+        """
+        Write a timecodes v2 file with one timestamp in milliseconds per frame
+
+        :param outfile:     Path or TextIO handle
+        """
+        stamps = self.timestamps()[:-1]
+        self._write(outfile, '# timestamp format v2\n' + ''.join(f'{t}\n' for t in stamps.tolist()))
+
+    def write_v1(self, outfile: AnyPath | TextIO, precision: int = 6) -> None:
+        """
+        Write a timecodes v1 file with one line per range of frames of the same frame rate
+
+        :param outfile:     Path or TextIO handle
+        :param precision:   Precision of fps
+        """
+        num, den = self.durations()
+        ticks, timescale = self.ticks()
+        # Start of every run of identical durations
+        changes = (num[1:] != num[:-1]) | (den[1:] != den[:-1])
+        starts = np.flatnonzero(np.concatenate([[True], changes])) if len(num) else np.zeros(0, np.intp)
+        ends = [*starts[1:].tolist(), len(num)]
+
+        lines = ['# timestamp format v1\n']
+        if len(num):
+            lines.append(f'assume {round(len(num) * timescale / int(ticks[-1]), precision)}\n')
+        lines.extend(
+            f'{s},{e - 1},{round(den[s] / num[s], precision)}\n' for s, e in zip(starts.tolist(), ends)
+        )
+        self._write(outfile, ''.join(lines))
+
+    @staticmethod
+    def _write(outfile: AnyPath | TextIO, text: str) -> None:
+        if isinstance(outfile, (str, os.PathLike)):
+            with VPath(outfile).open('w', encoding='utf-8') as file:
+                file.write(text)
+        else:
+            outfile.write(text)
@@ -5,6 +5,8 @@ from .audio import *
 from .base import *
 from .misc import *
 from .mux import *
+from .placement import *
+from .spool import *
 from .video import *
 
 __all__ = [
@@ -16,13 +18,18 @@ __all__ = [
 
     'AudioCutter', 'ScipyCutter', 'EztrimCutter', 'SoxCutter', 'PassthroughCutter',
     'VideoEncoder', 'VideoLanEncoder', 'X265', 'X264', 'LosslessEncoder', 'NVEncCLossless', 'FFV1',
+    'EncoderSink', 'EncoderBenchmark',
     'progress_update_func',
 
-    'make_qpfile', 'Qpfile', 'KeyframesFile', 'get_keyframes', 'get_vs_core',
+    'make_qpfile', 'write_qpfile', 'Qpfile', 'SceneChangeCache', 'KeyframesFile', 'get_keyframes', 'read_keyframes', 'get_source_keyframes', 'get_vs_core',
 
     'Track', 'MediaTrack', 'VideoTrack', 'AudioTrack', 'SubtitleTrack', 'ChaptersTrack',
     'SplitMode',
     'MatroskaFile',
 
+    'Spool', 'SpoolJob', 'spool_worker',
+
+    'CPUTopology', 'Placement', 'plan_placement', 'apply_placement',
+
     'SubProcessAsync'
 ]
@@ -1,29 +1,34 @@
 
 __all__ = [
-    'Qpfile', 'make_qpfile',
-    'KeyframesFile', 'get_keyframes',
+    'Qpfile', 'make_qpfile', 'write_qpfile', 'SceneChangeCache',
+    'KeyframesFile', 'get_keyframes', 'read_keyframes', 'get_source_keyframes',
     'get_vs_core', 'SubProcessAsync'
 ]
 
 import asyncio
+import hashlib
 import inspect
+import json
+import mmap
 import os
+import tempfile
 
-from fractions import Fraction
-from itertools import accumulate
-from typing import Iterable, List, NamedTuple, Optional, Union
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 import psutil
 import vapoursynth as vs
 
-from pytimeconv import Convert
-
 from .._logging import logger
 from ..binary_path import BinaryPath
+from ..bitstream import scan_bitstream
+from ..config import FileInfo
 from ..render import SceneChangeMode as SCM
-from ..render import find_scene_changes
+from ..render import SceneChangeProxy
+from ..progress import RenderProgress
+from ..render import _SOURCE_DETECTORS, _check_overlap, _detect_source_gaps, find_scene_changes
+from ..timecodes import Timecodes
 from ..vpathlib import VPath
-from ..vtypes import AnyPath
+from ..vtypes import AnyPath, DuplicateFrame, Trim
 from .base import BasicTool
 
 
@@ -37,8 +42,156 @@ class Qpfile(NamedTuple):
     """List of keyframes"""
 
 
-def make_qpfile(clip: vs.VideoNode, path: Optional[AnyPath] = None, /,
-                overwrite: bool = True, mode: Union[int, SCM] = SCM.WWXD | SCM.SCXVID) -> Qpfile:
+class SceneChangeCache:
+    """
+    On-disk cache of detected scene changes.
+
+    Entries are keyed by the identity of the source file, the trims, the detection mode
+    and the detection resolution so that editing the filter chain doesn't invalidate them.
+    The least recently used entries are evicted when the cache exceeds ``max_size``.
+    """
+
+    path: VPath
+    """Cache directory"""
+
+    max_size: int
+    """Maximum size of the cache in bytes"""
+
+    hash_content: bool
+    """Identify the source by a hash of its content instead of its modification time"""
+
+    def __init__(self, path: Optional[AnyPath] = None, max_size: int = 32 << 20, hash_content: bool = False) -> None:
+        """
+        :param path:            Cache directory.
+                                Default to "vardautomation/scenechanges" in ``$XDG_CACHE_HOME`` or ``~/.cache``
+        :param max_size:        Maximum size of the cache in bytes
+        :param hash_content:    Identify the source by a hash of its first and last 16 MiB and its size
+                                instead of its path and modification time.
+                                Copies and moves of a source then keep hitting the cache.
+        """
+        if path is None:
+            path = VPath(os.environ.get('XDG_CACHE_HOME') or VPath.home() / '.cache') / 'vardautomation' / 'scenechanges'
+        self.path = VPath(path)
+        self.max_size = max_size
+        self.hash_content = hash_content
+
+    def make_key(self, source: FileInfo | AnyPath, mode: Union[int, SCM], num_frames: int,
+                 trims: List[Union[Trim, DuplicateFrame]] | Trim | None = None,
+                 proxy: Optional[SceneChangeProxy] = None, **params: Any) -> Dict[str, Any]:
+        """
+        Make the key of an entry
+
+        :param source:          FileInfo or path of the source file.
+                                The trims of a FileInfo are used if ``trims`` is not specified
+        :param mode:            Scene change mode
+        :param num_frames:      Number of frames of the clip
+        :param trims:           Trims or DuplicateFrame objects applied to the source
+        :param proxy:           Scene change proxy used for the detection
+        :param params:          Additional parameters affecting the detection
+        :return:                JSON serialisable key
+        """
+        if isinstance(source, FileInfo):
+            if trims is None:
+                trims = source.trims_or_dfs
+            source = source.path
+        source = VPath(source).resolve()
+
+        stat = source.stat()
+        ident: Dict[str, Any] = dict(size=stat.st_size)
+        if self.hash_content:
+            ident.update(blake2b=self._hash_file(source, stat.st_size))
+        else:
+            ident.update(path=source.to_str(), mtime_ns=stat.st_mtime_ns)
+
+        return dict(
+            source=ident, trims=self._trims_spec(trims), mode=int(mode), num_frames=num_frames,
+            proxy=(proxy or SceneChangeProxy())._asdict(), **params
+        )
+
+    def get(self, key: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        Get the scene changes stored for ``key``
+
+        :param key:             Key made by :py:meth:`make_key`
+        :return:                List of scene changes or None if not found
+        """
+        entry = self._entry_path(key)
+        try:
+            with entry.open('r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != json.loads(json.dumps(key)):
+            return None
+        # Mark as recently used
+        os.utime(entry)
+        return [int(f) for f in data['frames']]
+
+    def put(self, key: Dict[str, Any], frames: Sequence[int]) -> None:
+        """
+        Store the scene changes of ``key`` and evict the least recently used entries if needed
+
+        :param key:             Key made by :py:meth:`make_key`
+        :param frames:          List of scene changes
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.path)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(dict(key=key, frames=list(frames)), file)
+            os.replace(tmp, self._entry_path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in ``max_size``"""
+        entries = []
+        for entry in self.path.glob('*.json'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        size = sum(e[1] for e in entries)
+        for _, esize, entry in sorted(entries, key=lambda e: e[0]):
+            if size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            size -= esize
+
+    def _entry_path(self, key: Dict[str, Any]) -> VPath:
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode(), usedforsecurity=False).hexdigest()
+        return self.path / f'{digest}.json'
+
+    @staticmethod
+    def _trims_spec(trims: List[Union[Trim, DuplicateFrame]] | Trim | None) -> Any:
+        if trims is None:
+            return None
+        if isinstance(trims, tuple):
+            return list(trims)
+        return [
+            ['dup', int(t), int(getattr(t, 'dup', 1))] if isinstance(t, DuplicateFrame) else list(t)
+            for t in trims
+        ]
+
+    @staticmethod
+    def _hash_file(path: VPath, size: int, chunk: int = 16 << 20) -> str:
+        h = hashlib.blake2b(str(size).encode())
+        with path.open('rb') as file:
+            h.update(file.read(chunk))
+            if size > chunk:
+                file.seek(max(chunk, size - chunk))
+                h.update(file.read(chunk))
+        return h.hexdigest()
+
+
+def make_qpfile(clip: vs.VideoNode, path: Optional[AnyPath] = None, /,  # noqa: C901
+                overwrite: bool = True, mode: Union[int, SCM] = SCM.WWXD | SCM.SCXVID,
+                segments: int = 1, *, proxy: Optional[SceneChangeProxy] = None,
+                cache: Optional[SceneChangeCache] = None, source: Optional[FileInfo] = None,
+                checkpoint: int = 0, overlap: int = 32, source_gap: int = 240) -> Qpfile:
     """
     Convenience function for making a qpfile
 
@@ -47,22 +200,163 @@ def make_qpfile(clip: vs.VideoNode, path: Optional[AnyPath] = None, /,
                             Default to the name of the script that run this function with the ".log" extension
     :param overwrite:       If True, will overwrite the file
     :param mode:            Scene change mode, defaults to SCM.WWXD_SCXVID_UNION
+    :param segments:        Number of ranges detected concurrently. See :py:func:`find_scene_changes`.
+    :param proxy:           Clip the detectors run on. See :py:class:`SceneChangeProxy`.
+    :param cache:           Scene change cache used to skip the detection pass when possible
+    :param source:          FileInfo ``clip`` comes from.
+                            Needed by ``cache`` to identify the clip and by the SOURCE modes
+    :param checkpoint:      Detect the scene changes by chunks of ``checkpoint`` frames.
+                            The scene changes are appended to a ".partial" file next to the qpfile after every chunk
+                            and a restarted make_qpfile resumes from the last completed chunk.
+                            0 disables checkpointing.
+    :param overlap:         Number of frames rendered before every chunk and every segment to warm up the detectors
+    :param source_gap:      Minimum distance between two source keyframes for the frames between them
+                            to be checked by the detector in the SOURCE modes. See :py:func:`find_scene_changes`.
     :return:                A Qpfile
     """
     path = VPath(inspect.stack()[-1].filename).with_suffix('.log') if not path else VPath(path)
 
     if not overwrite and path.exists():
         logger.critical(f'make_qpfile: a qpfile already exists at "{path.resolve().to_str()}"')
+    if cache and not source:
+        raise ValueError('make_qpfile: a FileInfo source is needed to identify the clip in the cache!')
+
+    source_mode = int(mode) & SCM.SOURCE == SCM.SOURCE
+    if source_mode and int(mode) not in _SOURCE_DETECTORS:
+        raise ValueError(f'make_qpfile: unsupported SOURCE mode {int(mode)}!')
+    if source_mode and not source:
+        raise ValueError('make_qpfile: a FileInfo source is needed by the SOURCE modes!')
+
+    key: Optional[Dict[str, Any]] = None
+    scenes: Optional[List[int]] = None
+    if cache and source:
+        key = cache.make_key(source, mode, clip.num_frames, proxy=proxy, source_gap=source_gap)
+        scenes = cache.get(key)
+        if scenes is not None:
+            logger.info(f'make_qpfile: reusing cached scene changes of "{source.path.to_str()}"')
+
+    if scenes is None:
+        # Only read the source keyframes when the detection actually runs
+        source_keyframes = get_source_keyframes(source) if source_mode and source else None
+        num_threads = vs.core.num_threads
+        if (oscpu := os.cpu_count()) is not None:
+            vs.core.num_threads = oscpu
+        try:
+            if checkpoint > 0:
+                scenes = _QpfileCheckpoint(path, clip, mode, proxy).run(
+                    checkpoint, overlap, segments, source_keyframes, source_gap
+                )
+            else:
+                scenes = find_scene_changes(
+                    clip, mode, proxy=proxy, segments=segments, overlap=overlap,
+                    source_keyframes=source_keyframes, source_gap=source_gap
+                )
+        finally:
+            vs.core.num_threads = num_threads
+        if cache and key:
+            cache.put(key, scenes)
+
+    return write_qpfile(path, scenes)
+
+
+def write_qpfile(path: AnyPath, frames: Sequence[int]) -> Qpfile:
+    """
+    Atomically write a qpfile with keyframes at ``frames``
+
+    :param path:            Path of the qpfile
+    :param frames:          List of keyframes
+    :return:                A Qpfile
+    """
+    path = VPath(path)
+    _write_atomic(path, ''.join(f'{s} K\n' for s in frames))
+    return Qpfile(path, list(frames))
+
+
+def _write_atomic(path: VPath, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.name, suffix='.tmp', dir=path.resolve().parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class _QpfileCheckpoint:
+    """Chunked scene change detection resumable from its last completed chunk"""
+
+    def __init__(self, path: VPath, clip: vs.VideoNode, mode: Union[int, SCM], proxy: Optional[SceneChangeProxy]) -> None:
+        self.clip = clip
+        self.partial = path.with_suffix(path.suffix + '.partial')
+        self.state = path.with_suffix(path.suffix + '.checkpoint')
+        self.key: Dict[str, Any] = dict(num_frames=clip.num_frames, mode=int(mode))
+        self.mode = mode
+        self.proxy = proxy or SceneChangeProxy()
+
+    def run(self, chunk: int, overlap: int, segments: int = 1,
+            source_keyframes: Optional[List[int]] = None, source_gap: int = 240) -> List[int]:
+        if int(self.mode) & SCM.SOURCE != SCM.SOURCE:
+            return self._run_chunks(self.clip, self.mode, self.proxy, chunk, overlap, segments)
+
+        # The long gaps between the source keyframes are spliced once for the whole clip
+        # and the splice is what gets detected by chunks
+        self.key.update(source_gap=source_gap, source=hashlib.sha1(json.dumps(source_keyframes).encode()).hexdigest())
+        return _detect_source_gaps(
+            self.clip, int(self.mode), self.proxy, None, source_keyframes, source_gap,
+            lambda gaps, detector, proxy: self._run_chunks(gaps, detector, proxy, chunk, overlap, segments)
+        )
 
-    num_threads = vs.core.num_threads
-    if (oscpu := os.cpu_count()) is not None:
-        vs.core.num_threads = oscpu
-    scenes = find_scene_changes(clip, mode)
-    vs.core.num_threads = num_threads
+    def _run_chunks(self, clip: vs.VideoNode, mode: Union[int, SCM], proxy: SceneChangeProxy,
+                    chunk: int, overlap: int, segments: int) -> List[int]:
+        # Every chunk but the first one needs warm-up frames, like the segments
+        _check_overlap(-(-clip.num_frames // chunk), overlap)
+        self.key.update(frames=clip.num_frames, detector=int(mode), proxy=proxy._asdict())
 
-    with path.open('w', encoding='utf-8') as file:
-        file.writelines(f'{s} K\n' for s in scenes)
-    return Qpfile(path, scenes)
+        scenes, start = self._load()
+        if start:
+            logger.info(f'make_qpfile: resuming scene change detection from frame {start}')
+
+        p = RenderProgress()
+        p.start()
+        try:
+            with self.partial.open('a', encoding='utf-8') as partial:
+                while start < clip.num_frames:
+                    end = min(start + chunk, clip.num_frames)
+                    first = start - min(overlap, start)
+                    found = [first + n for n in find_scene_changes(
+                        clip[first:end], mode, proxy=proxy, segments=segments, overlap=overlap, display=p
+                    ) if first + n >= start]
+
+                    partial.writelines(f'{s} K\n' for s in found)
+                    partial.flush()
+                    os.fsync(partial.fileno())
+                    scenes.extend(found)
+                    start = end
+                    _write_atomic(self.state, json.dumps(dict(key=self.key, next=start, size=partial.tell())))
+        finally:
+            p.stop()
+
+        self.partial.unlink()
+        self.state.unlink()
+        return scenes
+
+    def _load(self) -> Tuple[List[int], int]:
+        try:
+            with self.state.open('r', encoding='utf-8') as file:
+                state = json.load(file)
+            if state['key'] != json.loads(json.dumps(self.key)):
+                raise ValueError
+            with self.partial.open('r+', encoding='utf-8') as partial:
+                # Drop the scene changes of an interrupted chunk
+                partial.truncate(state['size'])
+                scenes = [int(line.split()[0]) for line in partial.read().splitlines()]
+            return scenes, int(state['next'])
+        except (OSError, ValueError, KeyError):
+            self.partial.unlink(missing_ok=True)
+            return [], 0
 
 
 class KeyframesFile(NamedTuple):
@@ -99,6 +393,98 @@ def get_keyframes(path: AnyPath) -> KeyframesFile:
     return file
 
 
+def read_keyframes(path: AnyPath) -> List[int]:
+    """
+    Get the keyframes of a video without indexing it.\n
+    Matroska files are read from the keyframe flags of their video blocks
+    and raw H.264/H.265 bitstreams from the types of their NAL units.
+    No file is written so it is safe to call concurrently.
+    Other files are indexed with :py:func:`get_keyframes`.
+
+    :param path:        Path of the video
+    :return:            List of keyframes
+    """
+    path = VPath(path)
+    with path.open('rb') as file:
+        magic = file.read(4)
+    if magic == _EBML_MAGIC:
+        return _mkv_keyframes(path)
+
+    index = scan_bitstream(path)
+    if index.codec is not None:
+        return index.keyframes
+
+    kfs = get_keyframes(path)
+    kfs.path.rm()
+    return kfs.frames
+
+
+def get_source_keyframes(file: FileInfo) -> List[int]:
+    """
+    Get the keyframes of the source bitstream of a FileInfo, mapped through its trims.
+    The L-SMASH Works index next to the source is read if it exists, otherwise ffmsindex is used.
+    The first frame of every trim is also considered as a keyframe.
+
+    :param file:        FileInfo object
+    :return:            List of keyframes of ``file.clip_cut``
+    """
+    if (lwi := VPath(file.path.to_str() + '.lwi')).exists():
+        keyframes = _lwi_keyframes(lwi)
+    else:
+        keyframes = read_keyframes(file.path)
+
+    kfset = set(keyframes)
+    keyframes_cut: List[int] = []
+    prev: Optional[int] = None
+    for i, n in enumerate(_trimmed_frames(file.clip.num_frames, file.trims_or_dfs)):
+        # Duplicated frames are never keyframes but every discontinuity is
+        if n != prev and (n in kfset or prev is None or prev + 1 != n):
+            keyframes_cut.append(i)
+        prev = n
+    return keyframes_cut
+
+
+def _lwi_keyframes(path: VPath) -> List[int]:
+    # Video samples are an "Index=" line followed by a "Key=" line, in decoding order
+    samples: Dict[int, List[Tuple[int, bool]]] = {}
+    index: Optional[int] = None
+    pts = 0
+    with path.open('r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            if line.startswith('Index='):
+                fields = dict(f.split('=', 1) for f in line.strip().split(',') if '=' in f)
+                index, pts = int(fields['Index']), int(fields.get('PTS', _NOPTS))
+            elif line.startswith('Key=') and index is not None:
+                samples.setdefault(index, []).append((pts, line[4] == '1'))
+                index = None
+    if not samples:
+        raise ValueError(f'get_source_keyframes: no video stream found in "{path.to_str()}"')
+
+    video = samples[min(samples)]
+    if all(pts != _NOPTS for pts, _ in video):
+        # Presentation order
+        video = sorted(video, key=lambda s: s[0])
+    return [i for i, (_, key) in enumerate(video) if key]
+
+
+_NOPTS = -0x8000000000000000
+
+
+def _trimmed_frames(num_frames: int, trims: List[Union[Trim, DuplicateFrame]] | Trim | None) -> List[int]:
+    # Source frame number of every frame of a clip adjusted by vardefunc.adjust_clip_frames
+    if not trims:
+        return list(range(num_frames))
+    if isinstance(trims, tuple):
+        trims = [trims]
+    frames: List[int] = []
+    for t in trims:
+        if isinstance(t, DuplicateFrame):
+            frames.extend([int(t)] * int(getattr(t, 'dup', 1)))
+        else:
+            frames.extend(range(num_frames)[slice(*t)])
+    return frames
+
+
 def get_vs_core(threads: Optional[Iterable[int]] = None, max_cache_size: Optional[int] = None) -> vs.Core:
     """
     Get the VapourSynth singleton core. Optionaly, set the number of threads used
@@ -132,25 +518,8 @@ def make_tcfile(clips: Iterable[vs.VideoNode], path: Optional[AnyPath] = None, p
     :param precision:   Precision of fps
     :return:            tcfile path
     """
-    num_frames, fpss, times = list[int](), list[Fraction](), list[float]()
-
-    for clip in clips:
-        num_frames.append(clip.num_frames)
-        fpss.append(clip.fps)
-        times.append(Convert.f2seconds(clip.num_frames, clip.fps))
-
-    start_frames = accumulate(num_frames[:-1], lambda x, y: x + y, initial=0)
-    end_frames = accumulate(num_frames[1:], lambda x, y: x + y, initial=num_frames[0] - 1)
-
     path = VPath(inspect.stack()[-1].filename).with_suffix('.tcfile') if not path else VPath(path)
-
-    with path.open('w', encoding='utf-8') as file:
-        file.write('# timestamp format v1\n')
-        file.write(f'assume {round(sum(num_frames) / sum(times), precision)}\n')  # type: ignore[arg-type]
-        file.writelines(
-            f'{s},{e},{round(float(fps), precision)}\n'
-            for s, e, fps in zip(start_frames, end_frames, fpss)
-        )
+    Timecodes.from_clips(clips).write_v1(path, precision)
 
     return path
 
@@ -189,3 +558,103 @@ class SubProcessAsync:
         proc = await asyncio.create_subprocess_shell(cmd)
         logger.debug(cmd)
         await proc.communicate()
+
+
+_EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+# Segment, Cluster, Tracks and TrackEntry are entered, every other element is skipped
+_MKV_MASTERS = {0x18538067, 0x1F43B675, 0x1654AE6B, 0xAE}
+
+
+def _ebml_vint(buf: mmap.mmap, pos: int, keep_marker: bool) -> Tuple[int, int, bool]:
+    first = buf[pos]
+    length = 9 - first.bit_length()
+    if length > 8:
+        raise ValueError('invalid EBML variable size integer')
+    value = first if keep_marker else first & (0xFF >> length)
+    unknown = value == (0xFF >> length)
+    for byte in buf[pos + 1:pos + length]:
+        value = value << 8 | byte
+        unknown &= byte == 0xFF
+    return value, pos + length, unknown and not keep_marker
+
+
+def _mkv_keyframes(path: VPath) -> List[int]:
+    with path.open('rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        reader = _MatroskaKeyframes(buf)
+        pos = 0
+        while pos < len(buf):
+            try:
+                pos = reader.element(pos)
+            except IndexError:
+                # Truncated file
+                break
+    if reader.video is None:
+        raise ValueError(f'read_keyframes: no video track found in "{path.to_str()}"')
+
+    # Presentation order
+    blocks = reader.blocks
+    order = sorted(range(len(blocks)), key=lambda i: blocks[i][0])
+    return [n for n, i in enumerate(order) if blocks[i][1]]
+
+
+class _MatroskaKeyframes:
+    """Walk through the elements of a Matroska file, only reading the headers of the blocks"""
+
+    def __init__(self, buf: mmap.mmap) -> None:
+        self.buf = buf
+        # Blocks of the first video track as (timestamp, keyframe) in decoding order
+        self.blocks: List[Tuple[int, bool]] = []
+        self.tracks: List[Dict[int, int]] = []
+        self.video: Optional[int] = None
+        self.cluster_ts = 0
+
+    def element(self, pos: int) -> int:
+        """Read the element at pos and return the position of the next one"""
+        buf = self.buf
+        eid, pos, _ = _ebml_vint(buf, pos, True)
+        size, pos, unknown = _ebml_vint(buf, pos, False)
+        if eid in _MKV_MASTERS:
+            if eid == 0xAE:
+                self.tracks.append({})
+            elif eid == 0x1F43B675 and self.video is None:
+                self.video = next((t.get(0xD7) for t in self.tracks if t.get(0x83) == 1), None)
+            return pos
+        if unknown:
+            raise ValueError('read_keyframes: unknown size of a non master element')
+
+        end = pos + size
+        if eid in (0xD7, 0x83) and self.tracks:
+            self.tracks[-1][eid] = int.from_bytes(buf[pos:end], 'big')
+        elif eid == 0xE7:
+            self.cluster_ts = int.from_bytes(buf[pos:end], 'big')
+        elif eid == 0xA3:
+            self.block(pos, None)
+        elif eid == 0xA0:
+            self.block_group(pos, end)
+        return end
+
+    def block_group(self, pos: int, end: int) -> None:
+        # The block of a BlockGroup is a keyframe if it doesn't reference any other block
+        buf = self.buf
+        block, ref = -1, False
+        while pos < end:
+            cid, pos, _ = _ebml_vint(buf, pos, True)
+            csize, pos, _ = _ebml_vint(buf, pos, False)
+            if cid == 0xA1:
+                block = pos
+            ref |= cid == 0xFB
+            pos += csize
+        if block >= 0:
+            self.block(block, not ref)
+
+    def block(self, pos: int, keyframe: Optional[bool]) -> None:
+        buf = self.buf
+        track, pos, _ = _ebml_vint(buf, pos, False)
+        if track != self.video or self.video is None:
+            return
+        timestamp = self.cluster_ts + int.from_bytes(buf[pos:pos + 2], 'big', signed=True)
+        flags = buf[pos + 2]
+        # Laced frames share the timestamp of their block
+        laced = buf[pos + 3] + 1 if flags & 0x06 else 1
+        self.blocks.append((timestamp, bool(flags & 0x80) if keyframe is None else keyframe))
+        self.blocks.extend([(timestamp, False)] * (laced - 1))
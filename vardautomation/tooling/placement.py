@@ -0,0 +1,179 @@
+"""Placement of the VapourSynth filter graph and of the encoders on the CPU cores"""
+
+__all__ = ['CPUTopology', 'Placement', 'plan_placement', 'apply_placement']
+
+import os
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import psutil
+import vapoursynth as vs
+
+from .._logging import logger
+from ..vpathlib import VPath
+from ..vtypes import AnyPath
+from .misc import get_vs_core
+from .video import VideoEncoder, VideoLanEncoder
+
+
+class CPUTopology:
+    """
+    Logical CPUs grouped by physical core (SMT siblings) and by shared last level cache,
+    which is a CCX on Zen processors and usually a whole package elsewhere.
+    """
+
+    groups: List[List[List[int]]]
+    """Cache groups, each one a list of physical cores, each one a list of logical CPUs"""
+
+    def __init__(self, groups: List[List[List[int]]]) -> None:
+        """
+        :param groups:      Cache groups, each one a list of physical cores, each one a list of logical CPUs
+        """
+        self.groups = groups
+
+    @property
+    def cores(self) -> List[List[int]]:
+        """Physical cores ordered by cache group"""
+        return [core for group in self.groups for core in group]
+
+    @property
+    def cpus(self) -> List[int]:
+        """Logical CPUs ordered by cache group and physical core"""
+        return [cpu for core in self.cores for cpu in core]
+
+    @classmethod
+    def read(cls, sysfs: AnyPath = '/sys/devices/system/cpu') -> 'CPUTopology':
+        """
+        Read the topology of the CPUs the current process is allowed to run on.
+        Without sysfs, every logical CPU is considered a core of a single group.
+
+        :param sysfs:       CPU directory of sysfs
+        :return:            CPUTopology object
+        """
+        root = VPath(sysfs)
+        try:
+            allowed = sorted(psutil.Process().cpu_affinity() or [])
+        except AttributeError:
+            allowed = []
+        allowed = allowed or list(range(os.cpu_count() or 1))
+        allowed_set = set(allowed)
+
+        cores: Dict[Tuple[int, ...], List[int]] = {}
+        groups: Dict[Tuple[int, ...], List[Tuple[int, ...]]] = {}
+        for cpu in allowed:
+            topo = root / f'cpu{cpu}' / 'topology'
+            siblings = _read_cpu_list(topo / 'core_cpus_list') or _read_cpu_list(topo / 'thread_siblings_list')
+            core = tuple(c for c in siblings if c in allowed_set) or (cpu, )
+            if core in cores:
+                continue
+            cores[core] = list(core)
+            group = tuple(_l3_cpus(root / f'cpu{cpu}' / 'cache') or _read_cpu_list(topo / 'package_cpus_list') or allowed)
+            groups.setdefault(group, []).append(core)
+
+        return cls([[cores[core] for core in group] for group in groups.values()])
+
+
+class Placement(NamedTuple):
+    """Disjoint sets of logical CPUs"""
+
+    vs: List[int]
+    """CPUs of the VapourSynth filter graph"""
+
+    encoders: List[List[int]]
+    """CPUs of every encoder process"""
+
+
+def plan_placement(encoders: int = 1, vs_cores: Optional[int] = None,
+                   topology: Optional[CPUTopology] = None) -> Placement:
+    """
+    Split the physical cores into a set for the VapourSynth filter graph and a set for every encoder process.
+    Each set takes consecutive cores of the same cache groups as much as possible
+    so that a set rarely spans two CCX and two sets rarely share one.
+
+    :param encoders:        Number of encoder processes running at once
+    :param vs_cores:        Number of physical cores of the filter graph.
+                            Defaults to an even share with the encoders.
+    :param topology:        CPU topology, defaults to :py:func:`CPUTopology.read`
+    :return:                Placement object
+    """
+    topology = topology or CPUTopology.read()
+    cores = topology.cores
+    if len(cores) < encoders + 1:
+        raise ValueError(f'plan_placement: {len(cores)} core(s) can\'t be split into {encoders + 1} sets')
+
+    # Indexes of the first core of every cache group
+    group_starts = [0]
+    for group in topology.groups:
+        group_starts.append(group_starts[-1] + len(group))
+
+    if vs_cores is None:
+        share = len(cores) // (encoders + 1)
+        vs_cores = _snap(share, group_starts, share // 4)
+    vs_cores = max(1, min(vs_cores, len(cores) - encoders))
+
+    rest = cores[vs_cores:]
+    rest_starts = [s - vs_cores for s in group_starts if s > vs_cores]
+    share = len(rest) // encoders
+    bounds = [0, *(_snap(round(len(rest) * i / encoders), rest_starts, share // 4) for i in range(1, encoders)), len(rest)]
+
+    return Placement(
+        [cpu for core in cores[:vs_cores] for cpu in core],
+        [[cpu for core in rest[s:e] for cpu in core] for s, e in zip(bounds[:-1], bounds[1:])]
+    )
+
+
+def apply_placement(placement: Placement, encoders: Sequence[VideoEncoder],
+                    max_cache_size: Optional[int] = None) -> vs.Core:
+    """
+    Pin the current process and its VapourSynth threads to the filter graph set
+    and every encoder to its own set. The encoders set their number of threads accordingly,
+    through ``--pools`` for x265 and ``--threads`` for x264.
+
+    :param placement:       Placement, usually from :py:func:`plan_placement`
+    :param encoders:        Encoders, in the order of :py:attr:`Placement.encoders`
+    :param max_cache_size:  VapourSynth cache size in megabytes, defaults to None
+    :return:                Vapoursynth Core
+    """
+    if len(encoders) > len(placement.encoders):
+        raise ValueError(f'apply_placement: {len(encoders)} encoders for {len(placement.encoders)} CPU sets')
+
+    for enc, cpus in zip(encoders, placement.encoders):
+        enc.cpu_affinity = cpus
+        if isinstance(enc, VideoLanEncoder):
+            enc._set_threads(len(cpus))
+        logger.debug(f'{enc.__class__.__name__}: CPUs {cpus}')
+
+    logger.debug(f'VapourSynth: CPUs {placement.vs}')
+    return get_vs_core(placement.vs, max_cache_size)
+
+
+def _snap(bound: int, group_starts: Sequence[int], tolerance: int) -> int:
+    # Move a boundary between two sets to the closest boundary between two cache groups, if close enough
+    closest = min(group_starts, key=lambda s: abs(s - bound), default=bound)
+    return closest if 0 < closest and abs(closest - bound) <= tolerance else bound
+
+
+def _read_cpu_list(path: VPath) -> List[int]:
+    # Format of sysfs lists such as "0-3,8-11"
+    try:
+        text = path.read_text(encoding='utf-8').strip()
+    except OSError:
+        return []
+    cpus = list[int]()
+    for item in filter(None, text.split(',')):
+        start, _, end = item.partition('-')
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def _l3_cpus(cache: VPath) -> List[int]:
+    # CPUs sharing the last level cache
+    best: Tuple[int, List[int]] = (0, [])
+    for index in sorted(cache.glob('index*')):
+        try:
+            level = int((index / 'level').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        if level > best[0]:
+            best = (level, _read_cpu_list(index / 'shared_cpu_list'))
+    return best[1] if best[0] >= 2 else []
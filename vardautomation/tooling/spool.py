@@ -0,0 +1,295 @@
+"""Encode chunks through a shared directory"""
+
+__all__ = ['Spool', 'SpoolJob', 'spool_worker']
+
+import json
+import os
+import runpy
+import socket
+import subprocess
+import time
+
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, cast
+
+import vapoursynth as vs
+
+from .._logging import logger
+from ..vpathlib import VPath
+from ..vtypes import AnyPath
+
+
+class SpoolJob(NamedTuple):
+    """Descriptor of a chunk to be encoded"""
+
+    id: str
+    """Job id, unique in the spool"""
+    script: str
+    """Path of the VapourSynth script outputting the clip"""
+    output: int
+    """Output index of the clip in the script"""
+    num_frames: int
+    """Number of frames of the whole clip, checked by the workers"""
+    start: int
+    """First frame of the chunk"""
+    end: int
+    """Frame after the last frame of the chunk"""
+    params: List[str]
+    """Encoder command line"""
+    y4m: bool
+    """YUV4MPEG2 headers"""
+    part: str
+    """Path where the encoder writes the chunk"""
+    threads_param: Optional[str] = None
+    """Encoder parameter setting its number of threads, filled by each worker"""
+
+
+class Spool:
+    """
+    Directory shared by a coordinator and any number of workers, possibly on several hosts.
+
+    Job descriptors move between the ``jobs``, ``claimed``, ``done`` and ``failed`` subdirectories
+    with atomic renames, so a job is claimed by a single worker even over NFS.
+    """
+
+    path: VPath
+    """Spool directory"""
+
+    def __init__(self, path: AnyPath) -> None:
+        """
+        :param path:        Spool directory, created if needed. Use the same absolute path on every host.
+        """
+        self.path = VPath(path).resolve()
+        for sub in ('jobs', 'claimed', 'done', 'failed', 'parts'):
+            (self.path / sub).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def parts(self) -> VPath:
+        """Directory of the encoded chunks"""
+        return self.path / 'parts'
+
+    def submit(self, job: SpoolJob) -> None:
+        """Add a job, visible to the workers once completely written"""
+        tmp = self.path / f'{job.id}.json.tmp'
+        with tmp.open('w', encoding='utf-8') as file:
+            json.dump(job._asdict(), file)
+        os.replace(tmp, self._desc('jobs', job.id))
+
+    def claim(self) -> Optional[SpoolJob]:
+        """
+        :return:            A pending job now owned by the caller or None if there is none
+        """
+        for desc in sorted((self.path / 'jobs').glob('*.json')):
+            claimed = self._desc('claimed', desc.stem)
+            try:
+                os.rename(desc, claimed)
+            except OSError:
+                # Claimed by another worker in the meantime
+                continue
+            with claimed.open('r', encoding='utf-8') as file:
+                job = SpoolJob(**json.load(file))
+            # The rename keeps the mtime of the submission, which would make the job look stale right away
+            self.heartbeat(job)
+            return job
+        return None
+
+    def heartbeat(self, job: SpoolJob) -> None:
+        """Tell the coordinator the job is still being worked on"""
+        try:
+            os.utime(self._desc('claimed', job.id))
+        except OSError:
+            pass
+
+    def complete(self, job: SpoolJob) -> bool:
+        """
+        Mark a job as done. A job put back in the meantime is taken back from the queue.
+
+        :return:            False if the job is neither claimed nor pending anymore
+        """
+        for sub in ('claimed', 'jobs'):
+            try:
+                os.replace(self._desc(sub, job.id), self._desc('done', job.id))
+            except FileNotFoundError:
+                continue
+            return True
+        return False
+
+    def fail(self, job: SpoolJob, error: str) -> bool:
+        """
+        Mark a job as failed, unless it was put back in the meantime and is now someone else's job
+
+        :return:            False if the job wasn't claimed anymore
+        """
+        log = self._desc('failed', job.id).with_suffix('.log')
+        with log.open('w', encoding='utf-8') as file:
+            file.write(error)
+        try:
+            os.replace(self._desc('claimed', job.id), self._desc('failed', job.id))
+        except FileNotFoundError:
+            log.rm(ignore_errors=True)
+            return False
+        return True
+
+    def requeue_stale(self, timeout: float) -> List[str]:
+        """
+        Put back the claimed jobs whose worker didn't give news for ``timeout`` seconds
+
+        :return:            Ids of the jobs put back
+        """
+        requeued = list[str]()
+        now = time.time()
+        for desc in (self.path / 'claimed').glob('*.json'):
+            try:
+                if now - desc.stat().st_mtime > timeout:
+                    os.rename(desc, self._desc('jobs', desc.stem))
+                    requeued.append(desc.stem)
+            except OSError:
+                continue
+        return requeued
+
+    def state(self, job_id: str) -> str:
+        """
+        :return:            ``'jobs'``, ``'claimed'``, ``'done'``, ``'failed'`` or ``''`` if unknown
+        """
+        for sub in ('done', 'failed', 'claimed', 'jobs'):
+            if self._desc(sub, job_id).exists():
+                return sub
+        return ''
+
+    def remove(self, job_id: str) -> None:
+        for sub in ('jobs', 'claimed', 'done', 'failed'):
+            self._desc(sub, job_id).rm(ignore_errors=True)
+        self._desc('failed', job_id).with_suffix('.log').rm(ignore_errors=True)
+
+    def error(self, job_id: str) -> str:
+        try:
+            with self._desc('failed', job_id).with_suffix('.log').open('r', encoding='utf-8') as file:
+                return file.read()
+        except OSError:
+            return ''
+
+    def wait(self, jobs: Sequence[SpoolJob], *, poll_interval: float = 5.0, stale_timeout: float = 600.0,
+             on_done: Optional[Callable[[SpoolJob], None]] = None) -> None:
+        """
+        Wait for jobs to be done, putting back the jobs of dead workers
+
+        :param jobs:            Jobs to wait for
+        :param poll_interval:   Time in seconds between two looks at the spool
+        :param stale_timeout:   Time in seconds after which a claimed job without news is put back
+        :param on_done:         Called once for every job done
+        """
+        pending = {job.id: job for job in jobs}
+        while pending:
+            for job_id in self.requeue_stale(stale_timeout):
+                logger.warning(f'Spool: no news of the worker of {job_id}, putting it back')
+            for job_id, job in list(pending.items()):
+                state = self.state(job_id)
+                if state == 'failed':
+                    raise RuntimeError(f'Spool: {job_id} failed; {self.error(job_id)}')
+                if state == 'done':
+                    del pending[job_id]
+                    if on_done:
+                        on_done(job)
+            if pending:
+                time.sleep(poll_interval)
+
+    def _desc(self, sub: str, job_id: str) -> VPath:
+        return self.path / sub / f'{job_id}.json'
+
+
+def spool_worker(spool: AnyPath | Spool, *, poll_interval: float = 5.0, idle_timeout: Optional[float] = None,
+                 threads: int = 0) -> int:
+    """
+    Encode the jobs of a spool until there is no job left for ``idle_timeout`` seconds.
+
+    Each job runs its VapourSynth script like vspipe does, with ``__name__`` set to ``'__vapoursynth__'``,
+    so the script must set its outputs outside of its ``if __name__ == '__main__':`` block.
+
+    :param spool:           Spool or spool directory
+    :param poll_interval:   Time in seconds between two looks for new jobs
+    :param idle_timeout:    Return after that many seconds without any job. If None, never return.
+    :param threads:         Encoder threads. Defaults to every core of the host.
+    :return:                Number of jobs done
+    """
+    spool = spool if isinstance(spool, Spool) else Spool(spool)
+    worker = f'{socket.gethostname()}-{os.getpid()}'
+    clips: Dict[Tuple[str, float, int], vs.VideoNode] = {}
+    done = 0
+    idle_since = time.monotonic()
+
+    while True:
+        job = spool.claim()
+        if job is None:
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return done
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f'{worker}: encoding {job.id} (frames {job.start}-{job.end - 1})')
+        try:
+            _encode_job(spool, job, _job_clip(job, clips), threads or os.cpu_count() or 1, worker)
+        except Exception as err:
+            logger.warning(f'{worker}: {job.id} failed: {err}')
+            if not spool.fail(job, f'{worker}: {err!r}'):
+                logger.warning(f'{worker}: {job.id} was put back in the meantime, leaving it to its new worker')
+        else:
+            if not spool.complete(job):
+                logger.warning(f'{worker}: {job.id} was put back and claimed again in the meantime')
+            done += 1
+        idle_since = time.monotonic()
+
+
+def _job_clip(job: SpoolJob, clips: Dict[Tuple[str, float, int], vs.VideoNode]) -> vs.VideoNode:
+    key = (job.script, os.stat(job.script).st_mtime, job.output)
+    if key not in clips:
+        clips.clear()
+        vs.clear_outputs()
+        runpy.run_path(job.script, run_name='__vapoursynth__')
+        output = vs.get_output(job.output)
+        if isinstance(output, vs.AudioNode):
+            raise ValueError(f'the output {job.output} of the script is not a video')
+        clips[key] = output.clip
+    clip = clips[key]
+    if clip.num_frames != job.num_frames:
+        raise ValueError(f'the script outputs {clip.num_frames} frames instead of {job.num_frames}')
+    return clip[job.start:job.end]
+
+
+def _encode_job(spool: Spool, job: SpoolJob, clip: vs.VideoNode, threads: int, worker: str) -> None:
+    params = list(job.params)
+    if job.threads_param:
+        params.extend([job.threads_param, str(threads)])
+
+    # Write next to the final part so that an interrupted job never leaves a truncated part behind.
+    # Every worker has its own file since a job put back can be encoded by two workers at once.
+    part = VPath(job.part)
+    tmp = part.with_name(f'{part.stem}.{worker}.tmp{part.suffix}')
+    params = [tmp.to_str() if p == job.part else p for p in params]
+
+    last = time.monotonic()
+
+    def _heartbeat(value: int, endvalue: int) -> None:
+        nonlocal last
+        if time.monotonic() - last > 10:
+            last = time.monotonic()
+            spool.heartbeat(job)
+
+    try:
+        with subprocess.Popen(params, stdin=subprocess.PIPE) as process:
+            clip.output(cast(BinaryIO, process.stdin), job.y4m, _heartbeat)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, params)
+        os.replace(tmp, part)
+    finally:
+        tmp.rm(ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Encode the chunks of a vardautomation spool')
+    parser.add_argument('spool', help='spool directory')
+    parser.add_argument('--poll-interval', type=float, default=5.0)
+    parser.add_argument('--idle-timeout', type=float, default=None)
+    parser.add_argument('--threads', type=int, default=0)
+    args = parser.parse_args()
+    spool_worker(args.spool, poll_interval=args.poll_interval, idle_timeout=args.idle_timeout, threads=args.threads)
@@ -2,29 +2,48 @@
 __all__ = [
     'VideoEncoder', 'VideoLanEncoder', 'X265', 'X264',
     'LosslessEncoder', 'NVEncCLossless', 'FFV1',
+    'EncoderSink', 'EncoderBenchmark',
     'progress_update_func'
 ]
 
+import bisect
+import copy
+import inspect
+import json
+import math
+import os
+import shutil
 import subprocess
+import sys
+import tempfile
+import threading
+import time
 
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import (
-    Any, BinaryIO, Callable, ClassVar, Dict, List, NoReturn, Optional, Sequence, Set, Tuple, cast,
-    overload
+    Any, BinaryIO, Callable, ClassVar, Dict, List, NamedTuple, NoReturn, Optional, Sequence, Set, Tuple,
+    cast, overload
 )
 
+import psutil
 import vapoursynth as vs
 
 from .._logging import logger
+from ..bitstream import BitstreamScanner, Codec, scan_bitstream
 from ..binary_path import BinaryPath
 from ..config import FileInfo
+from ..progress import RenderProgress, ThrottledUpdateFunc
+from ..render import AdaptivePrefetch, RenderSink, RenderStats, Y4MWriter, request_frames
 from ..utils import Properties, copy_docstring_from
 from ..vpathlib import VPath
 from ..vtypes import AnyPath, UpdateFunc
 from .abstract import Tool
 from .base import BasicTool
-from .misc import Qpfile, get_keyframes, make_qpfile, make_tcfile
+from .misc import Qpfile, _write_atomic, make_qpfile, make_tcfile, read_keyframes, write_qpfile
 from .mux import MatroskaFile
+from .spool import Spool, SpoolJob
 
 
 def progress_update_func(value: int, endvalue: int) -> None:
@@ -34,12 +53,31 @@ def progress_update_func(value: int, endvalue: int) -> None:
     :param value:       Current value
     :param endvalue:    End value
     """
-    # pylint: disable=consider-using-f-string
-    if value == 0:
-        return
-    logger.logger.opt(raw=True).info(
-        "\rVapourSynth: %i/%i ~ %.2f%% || Encoder: " % (value, endvalue, 100 * value / endvalue)
-    )
+    _vs_progress(value, endvalue)
+
+
+_vs_progress = ThrottledUpdateFunc("\rVapourSynth: %i/%i ~ %.2f%% || Encoder: ", "VapourSynth")
+
+
+class EncoderBenchmark(NamedTuple):
+    """Result of :py:func:`VideoEncoder.benchmark`. Frame rates are in frames per second"""
+
+    frames: int
+    """Number of benchmarked frames"""
+    filter_fps: float
+    """Filter chain rendered to a null sink"""
+    pipe_fps: float
+    """Filter chain piped to the encoder, like a normal encode"""
+    encoder_fps: float
+    """Encoder fed from frames rendered in memory beforehand"""
+    bottleneck: str
+    """``'filter chain'``, ``'encoder'`` or ``'pipe'`` if the encode is much slower than both sides"""
+    prefetch: int
+    """Suggested :py:attr:`VideoEncoder.prefetch`"""
+    backlog: int
+    """Suggested :py:attr:`VideoEncoder.backlog`"""
+    num_threads: int
+    """Suggested ``core.num_threads``"""
 
 
 class VideoEncoder(Tool):
@@ -70,6 +108,26 @@ class VideoEncoder(Tool):
     This argument is there to limit the memory this function uses storing frames.
     """
 
+    stats: Optional[RenderStats] = None
+    """
+    Opt-in per-frame timings of the encode, reported at the end.\n
+    The frames are then requested by :py:func:`vardautomation.render.request_frames` instead of `vapoursynth.VideoNode.output`.
+    """
+
+    adaptive_prefetch: Optional[AdaptivePrefetch] = None
+    """
+    Opt-in tuning of :py:attr:`prefetch` and :py:attr:`backlog` during the encode, within a memory budget.\n
+    The frames are then requested by :py:func:`vardautomation.render.request_frames` instead of `vapoursynth.VideoNode.output`.
+    """
+
+    cpu_affinity: Optional[Sequence[int]] = None
+    """
+    Logical CPUs the encoder process is pinned to. Otherwise it inherits the affinity of the Python process.\n
+    See :py:func:`vardautomation.tooling.placement.apply_placement`.
+    """
+
+    _cpu_share: Optional[int] = None
+
     def __init__(self, binary: AnyPath, settings: AnyPath | List[str] | Dict[str, Any]) -> None:
         """
         ::
@@ -144,8 +202,238 @@ class VideoEncoder(Tool):
 
     def _do_encode(self) -> None:
         logger.info(f'{self.__class__.__name__} command: ' + ' '.join(self.params))
-        with logger.catch_ctx(), subprocess.Popen(self.params, stdin=subprocess.PIPE) as process:
-            self.clip.output(cast(BinaryIO, process.stdin), self.y4m, self.progress_update, self.prefetch, self.backlog)
+        with logger.catch_ctx(), self._popen(stdin=subprocess.PIPE) as process:
+            _enlarge_pipe(cast(BinaryIO, process.stdin))
+            if self.stats is None and self.adaptive_prefetch is None:
+                self.clip.output(cast(BinaryIO, process.stdin), self.y4m, self.progress_update, self.prefetch, self.backlog)
+            else:
+                self._output_frames(cast(BinaryIO, process.stdin), self.stats)
+
+    def _cpus(self) -> int:
+        # Cores this encoder may use: its share when it runs next to other encoders, its CPU set or every core
+        return self._cpu_share or len(self.cpu_affinity or []) or os.cpu_count() or 1
+
+    def _popen(self, **kwargs: Any) -> 'subprocess.Popen[bytes]':
+        if not self.cpu_affinity:
+            return subprocess.Popen(self.params, **kwargs)
+        cpus = list(self.cpu_affinity)
+        if sys.platform == 'linux':
+            # The affinity of the calling thread is inherited by the child, so the threads
+            # the encoder starts right away are pinned too. preexec_fn isn't safe with other threads running.
+            previous = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, cpus)
+            try:
+                process = subprocess.Popen(self.params, **kwargs)
+            finally:
+                os.sched_setaffinity(0, previous)
+        else:
+            process = subprocess.Popen(self.params, **kwargs)
+            try:
+                psutil.Process(process.pid).cpu_affinity(cpus)
+            except (AttributeError, psutil.Error) as err:
+                logger.warning(f'{self.__class__.__name__}: couldn\'t set the CPU affinity of the encoder; {err}')
+        return process
+
+    def _output_frames(self, outfile: BinaryIO, stats: Optional[RenderStats]) -> None:
+        writer = Y4MWriter(outfile, y4m=self.y4m)
+        writer.write_header(self.clip)
+        frames = request_frames(
+            self.clip, prefetch=self.prefetch, backlog=self.backlog, stats=stats, adaptive=self.adaptive_prefetch
+        )
+        for n, f in frames:
+            writer.write_frame(f)
+            if self.progress_update:
+                self.progress_update(n + 1, self.clip.num_frames)
+        writer.flush()
+        if stats:
+            stats.report()
+
+    @logger.catch
+    def benchmark(self, clip: vs.VideoNode, file: FileInfo | None = None, *,
+                  num_ranges: int = 4, range_size: int = 48) -> EncoderBenchmark:
+        """
+        Find out whether the filter chain or the encoder limits the speed of an encode
+        and suggest ``prefetch``, ``backlog`` and ``core.num_threads`` values.
+
+        Frame ranges spread evenly over the clip are rendered to a null sink, other ranges are piped to the encoder
+        so that both passes start from a cold cache, then the second ranges are spooled to a temporary file
+        and fed to the encoder from there.
+        The encoder output gets a ``_benchmark`` suffix and is deleted afterwards.
+
+        :param clip:            Clip to be encoded
+        :param file:            FileInfo object
+        :param num_ranges:      Number of frame ranges of each pass
+        :param range_size:      Number of frames of each range
+        :return:                Frame rates and suggestions
+        """
+        if file:
+            self.file = file
+
+        filter_sample, pipe_sample = _benchmark_samples(clip, num_ranges, range_size)
+
+        # Filter chain only
+        filter_stats = RenderStats()
+        start = time.perf_counter()
+        for _ in request_frames(filter_sample, prefetch=self.prefetch, backlog=self.backlog, stats=filter_stats):
+            pass
+        filter_fps = filter_sample.num_frames / (time.perf_counter() - start)
+
+        params = self.params.copy()
+        output = VPath(self.file.name_clip_output) if hasattr(self, 'file') else None
+        encode_clip: Optional[vs.VideoNode] = getattr(self, 'clip', None)
+        try:
+            if output:
+                self.file.name_clip_output = output.append_stem('_benchmark')
+            self.clip = pipe_sample
+            self._update_settings()
+            # Filter chain piped to the encoder, before anything else renders these frames
+            pipe_fps = pipe_sample.num_frames / self._benchmark_encode(
+                lambda stdin: self._output_frames(stdin, RenderStats())
+            )
+
+            with tempfile.TemporaryFile(dir=output.resolve().parent if output else None) as spooled:
+                self._output_frames(cast(BinaryIO, spooled), None)
+
+                def _feed(stdin: BinaryIO) -> None:
+                    spooled.seek(0)
+                    shutil.copyfileobj(spooled, stdin, 1 << 20)
+
+                # Encoder only
+                encoder_fps = pipe_sample.num_frames / self._benchmark_encode(_feed)
+        finally:
+            self.params = params
+            if encode_clip is not None:
+                self.clip = encode_clip
+            else:
+                del self.clip
+            if output:
+                for path in self._benchmark_outputs():
+                    path.rm(ignore_errors=True)
+                self.file.name_clip_output = output
+
+        bench = self._benchmark_result(pipe_sample.num_frames, filter_fps, pipe_fps, encoder_fps, filter_stats)
+        logger.info(
+            f'{self.__class__.__name__} benchmark on {bench.frames} frames: '
+            + f'filter chain {bench.filter_fps:.2f} fps, encoder {bench.encoder_fps:.2f} fps, '
+            + f'filter chain piped to the encoder {bench.pipe_fps:.2f} fps'
+        )
+        logger.info(
+            f'Limited by the {bench.bottleneck}. Suggested settings: prefetch={bench.prefetch}, '
+            + f'backlog={bench.backlog}, core.num_threads={bench.num_threads}'
+        )
+        return bench
+
+    def _benchmark_outputs(self) -> List[VPath]:
+        return [self.file.name_clip_output]
+
+    def _benchmark_encode(self, feed: Callable[[BinaryIO], Any]) -> float:
+        start = time.perf_counter()
+        with self._popen(stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as process:
+            try:
+                feed(cast(BinaryIO, process.stdin))
+            finally:
+                cast(BinaryIO, process.stdin).close()
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, self.params)
+        return time.perf_counter() - start
+
+    def _benchmark_result(self, frames: int, filter_fps: float, pipe_fps: float, encoder_fps: float,
+                          filter_stats: RenderStats) -> EncoderBenchmark:
+        cpus = os.cpu_count() or 1
+        num_threads = vs.core.num_threads
+
+        if pipe_fps < 0.85 * min(filter_fps, encoder_fps):
+            # Both sides are fast enough but don't overlap; more frames in advance should help
+            bottleneck, target_fps = 'pipe', min(filter_fps, encoder_fps)
+        elif filter_fps < encoder_fps:
+            bottleneck, target_fps = 'filter chain', encoder_fps
+            num_threads = cpus
+        else:
+            # VapourSynth only has to keep up with the encoder, leave the other cores to it
+            bottleneck, target_fps = 'encoder', encoder_fps
+            num_threads = max(1, min(cpus, math.ceil(num_threads * 1.2 * encoder_fps / filter_fps)))
+
+        summary = filter_stats.summary()
+        # Frames in flight needed to sustain the target frame rate with the measured latencies
+        prefetch = max(num_threads, math.ceil(target_fps * summary.latency_p50))
+        backlog = max(prefetch * 3, prefetch + math.ceil(target_fps * summary.latency_p99))
+        return EncoderBenchmark(frames, filter_fps, pipe_fps, encoder_fps, bottleneck, prefetch, backlog, num_threads)
+
+
+def _benchmark_samples(clip: vs.VideoNode, num_ranges: int, range_size: int) -> Tuple[vs.VideoNode, vs.VideoNode]:
+    # Two samples of interleaved ranges spread evenly over the clip, sharing no frame if the clip is long enough
+    size = max(1, min(range_size, clip.num_frames))
+    count = max(1, min(2 * num_ranges, clip.num_frames // size))
+    starts = sorted({round(i * (clip.num_frames - size) / max(count - 1, 1)) for i in range(count)})
+    samples = [
+        vs.core.std.Splice([clip[s:s + size] for s in ranges]) if len(ranges) > 1 else clip[ranges[0]:ranges[0] + size]
+        for ranges in (starts[::2], starts[1::2] or starts)
+    ]
+    return samples[0], samples[1]
+
+
+def _enlarge_pipe(pipe: BinaryIO) -> None:
+    # Bigger pipe buffers mean fewer context switches between us and the encoder
+    if sys.platform != 'linux':
+        return
+    import fcntl
+    try:
+        with open('/proc/sys/fs/pipe-max-size', 'r', encoding='utf-8') as file:
+            size = int(file.read())
+        fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, size)
+    except (OSError, ValueError) as err:
+        logger.debug(f'Couldn\'t enlarge the encoder pipe: {err}')
+
+
+class EncoderSink(RenderSink):
+    """Feeds the frames of :py:func:`vardautomation.render.tee_render` to the stdin of a VideoEncoder"""
+
+    encoder: VideoEncoder
+    """VideoEncoder object"""
+
+    def __init__(self, encoder: VideoEncoder, file: FileInfo | None) -> None:
+        """
+        :param encoder:         VideoEncoder reading a clip from its stdin.
+                                Its ``_do_encode`` isn't used so the encoder features relying on it aren't available.
+        :param file:            FileInfo object
+        """
+        self.encoder = encoder
+        self.file = file
+        self.process: Optional[subprocess.Popen[bytes]] = None
+        self.writer: Optional[Y4MWriter] = None
+
+    def start(self, clip: vs.VideoNode) -> None:
+        if self.file:
+            self.encoder.file = self.file
+        self.encoder.clip = clip
+        self.encoder._update_settings()
+        logger.info(f'{self.encoder.__class__.__name__} command: ' + ' '.join(self.encoder.params))
+        self.process = self.encoder._popen(stdin=subprocess.PIPE)
+        _enlarge_pipe(cast(BinaryIO, self.process.stdin))
+        self.writer = Y4MWriter(cast(BinaryIO, self.process.stdin), y4m=self.encoder.y4m)
+        self.writer.write_header(clip)
+
+    def write(self, n: int, frame: vs.VideoFrame) -> None:
+        assert self.writer
+        self.writer.write_frame(frame)
+        if self.encoder.progress_update:
+            self.encoder.progress_update(n + 1, self.encoder.clip.num_frames)
+
+    def close(self) -> None:
+        if not self.process:
+            return
+        try:
+            if self.writer:
+                self.writer.flush()
+        finally:
+            try:
+                cast(BinaryIO, self.process.stdin).close()
+            except BrokenPipeError:
+                # The encoder is gone, its return code tells why
+                pass
+            self.process.wait()
+            if self.process.returncode:
+                raise subprocess.CalledProcessError(self.process.returncode, self.encoder.params)
 
 
 class LosslessEncoder(VideoEncoder):
@@ -170,6 +458,9 @@ class LosslessEncoder(VideoEncoder):
             logger.debug(str(attr_err))
             return {}
 
+    def _benchmark_outputs(self) -> List[VPath]:
+        return [*super()._benchmark_outputs(), self.file.name_clip_output.append_stem(self.suffix_name)]
+
 
 class NVEncCLossless(LosslessEncoder):
     """Built-in NvencC encoder."""
@@ -265,6 +556,108 @@ class SupportQpfile(VideoEncoder, ABC):
             crap.rm(ignore_errors=True)
 
 
+class _ResumeManifest:
+    """
+    Sidecar of a resumable part recording the pictures confirmed written and the last keyframe.
+    The part is scanned incrementally while the encoder writes it, so a resume doesn't have to index it again.
+    """
+
+    def __init__(self, part: VPath, interval: float = 5.0) -> None:
+        self.part = part
+        self.path = part.append_stem('_manifest').with_suffix('.json')
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ResumeManifest', daemon=True)
+        self._scanner = BitstreamScanner()
+        self.codec: Optional[Codec] = None
+        """Codec of the part, None if it isn't a raw bitstream"""
+
+    def __enter__(self) -> '_ResumeManifest':
+        self.path.rm(ignore_errors=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        # Only a clean exit guarantees the encoder flushed the whole bitstream
+        self._write(final=exc_type is None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write(final=False)
+
+    def _write(self, final: bool) -> None:
+        if not self.part.exists():
+            return
+        try:
+            index = self._scanner.update(self.part).index(final)
+        except OSError as err:
+            logger.debug(str(err))
+            return
+        self.codec = index.codec
+        if index.codec is None:
+            # Not a raw bitstream, the part will be indexed on resume
+            return
+        _write_atomic(self.path, json.dumps(dict(
+            codec=index.codec.value, pictures=index.pictures, end=index.end, complete=final,
+            keyframe=index.keyframes[-1] if index.keyframes else 0,
+            offset=index.offsets[-1] if index.offsets else 0
+        )))
+
+    @classmethod
+    def last_keyframe(cls, part: VPath) -> Optional[Tuple[int, int]]:
+        """
+        :return:            Last keyframe of the part and the byte offset of its access unit
+                            or None if the manifest is missing or doesn't match the part
+        """
+        path = part.append_stem('_manifest').with_suffix('.json')
+        try:
+            with path.open('r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            keyframe, offset = int(manifest['keyframe']), int(manifest['offset'])
+            if part.stat().st_size < int(manifest['end']):
+                raise ValueError('the part is shorter than its manifest')
+            with part.open('rb') as file:
+                file.seek(offset)
+                head = file.read(4)
+            if not (head[:3] == b'\x00\x00\x01' or head == b'\x00\x00\x00\x01'):
+                raise ValueError('no access unit at the last keyframe')
+            # The encoder may have written more keyframes after the last manifest update
+            tail = BitstreamScanner(Codec(manifest['codec']), offset).update(part).index(bool(manifest['complete']))
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.debug(f'{path.name}: {err}')
+            return None
+        if tail.codec is None:
+            return None
+        if tail.keyframes:
+            return keyframe + tail.keyframes[-1], tail.offsets[-1]
+        return keyframe, offset
+
+
+def _keyframe_offset(part: VPath, keyframe: int) -> Optional[int]:
+    index = scan_bitstream(part)
+    if index.codec is None or keyframe not in index.keyframes:
+        return None
+    return index.offsets[index.keyframes.index(keyframe)]
+
+
+def _concat_bitstreams(pieces: Sequence[Tuple[VPath, Optional[int]]], output: VPath) -> None:
+    """Write the beginning of each part, up to the given byte offset or whole, one after another"""
+    buf = bytearray(1 << 24)
+    view = memoryview(buf)
+    with output.open('wb') as out:
+        for part, size in pieces:
+            with part.open('rb') as file:
+                remaining = part.stat().st_size if size is None else size
+                while remaining > 0:
+                    n = file.readinto(view[:min(remaining, len(buf))])
+                    if not n:
+                        raise ValueError(f'{part.name} is shorter than expected')
+                    out.write(view[:n])
+                    remaining -= n
+
+
 class SupportResume(SupportQpfile, ABC):
     # pylint: disable=arguments-differ
     resumable = False
@@ -312,20 +705,31 @@ class SupportResume(SupportQpfile, ABC):
 
         # Get the last keyframes where you can encode from
         _kfs = list[int]()
+        # Byte offsets of these keyframes in raw bitstreams
+        _cuts = list[Optional[int]]()
         for part in _parts:
+            cut = _ResumeManifest.last_keyframe(part)
+            if cut is not None:
+                logger.debug(f'{part.name}: last keyframe {cut[0]} read from its manifest')
+                if cut[0] == 0:
+                    del _parts[-1]
+                else:
+                    _kfs.append(cut[0])
+                    _cuts.append(cut[1])
+                continue
             try:
-                kfnt = get_keyframes(part)
-                logger.trace(str(kfnt._asdict()))
-                kf = kfnt.frames[-1]
+                keyframes = read_keyframes(part)
+                logger.trace(f'{part.name}: {keyframes}')
+                kf = keyframes[-1]
                 # If the last keyframe is 0 then we can just overwrite the last encode
                 if kf == 0:
                     del _parts[-1]
                 else:
                     _kfs.append(kf)
-                kfnt.path.rm()
-            # If subprocess throws an error the file is probably corrupted.
+                    _cuts.append(None)
+            # If the file can't be read it is probably corrupted.
             # Let the encoder overwrite it
-            except subprocess.CalledProcessError as err:
+            except (subprocess.CalledProcessError, ValueError, IndexError) as err:
                 logger.debug(str(err))
                 del _parts[-1]
         logger.debug(str(_parts))
@@ -340,10 +744,29 @@ class SupportResume(SupportQpfile, ABC):
             logger.info(f'Start frame of the qpfile_clip is now {start_frame}')
             qpfile_clip = qpfile_clip[start_frame:]
 
-        super().run_enc(clip, self.file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
+        with _ResumeManifest(self.file.name_clip_output) as manifest:
+            super().run_enc(clip, self.file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
 
         logger.info('Resumable encode; merging...')
 
+        pattern_qpfile = _output.resolve().append_stem('_part_???_qpfile').with_suffix('.log')
+        pattern_manifest = _output.resolve().append_stem('_part_???_manifest').with_suffix('.json')
+        _workfiles = [*pattern_qpfile.parent.glob(pattern_qpfile.name), *pattern_manifest.parent.glob(pattern_manifest.name)]
+
+        # Raw bitstreams are cut at their keyframes and written one after another straight into the output
+        if manifest.codec is not None and _output.suffix.lower() != '.mkv':
+            _cuts = [
+                _keyframe_offset(part, kf) if cut is None else cut
+                for kf, cut, part in zip(_kfs, _cuts, _parts)
+            ]
+            if None not in _cuts:
+                logger.debug('Merging the raw parts...')
+                _concat_bitstreams([*zip(_parts, _cuts), (self.file.name_clip_output, None)], _output)
+                self.file.name_clip_output = _output
+                for crap in [*_parts, *_workfiles]:
+                    crap.rm(ignore_errors=True)
+                return None
+
         # Files to delete
         _craps: Set[VPath] = set()
         # Split the files until the last keyframe
@@ -395,8 +818,7 @@ class SupportResume(SupportQpfile, ABC):
         # Extract the merged file
         BasicTool(BinaryPath.mkvextract, [output.to_str(), 'tracks', f'0:{self.file.name_clip_output.to_str()}']).run()
         # Delete working files
-        pattern_qpfile = self.file.name_clip_output.resolve().append_stem('_part_???_qpfile').with_suffix('.log')
-        _craps.update(pattern_qpfile.parent.glob(pattern_qpfile.name))
+        _craps.update(_workfiles)
         for crap in _craps:
             crap.rm()
         del _craps
@@ -408,6 +830,18 @@ class SupportManualVFR(SupportResume, ABC):
     # pylint: disable=arguments-differ
     tcfile: VPath
 
+    vfr_workers: int = 0
+    """
+    Number of constant frame rate segments encoded at once by as many encoder processes.\n
+    ``0`` or ``1`` encodes the segments one after another.
+    """
+
+    vfr_threads: int = 0
+    """
+    Threads of every encoder process when :py:attr:`vfr_workers` is enabled.
+    Defaults to the cores of the encoder shared evenly.
+    """
+
     @overload
     def run_enc(self, clip: vs.VideoNode, file: FileInfo) -> None:
         ...
@@ -451,21 +885,277 @@ class SupportManualVFR(SupportResume, ABC):
 
         base_name = VPath(file.name_clip_output)
         outputs = list[VPath]()
+        segments = list[Tuple[vs.VideoNode, VPath]]()
 
-        for i, c in enumerate(clip):
-            params = self.params.copy()
-            file.name_clip_output = base_name.append_stem(f'_vfr_{i:03.0f}_{c.fps.numerator}_{c.fps.denominator}')
-            outputs.append(file.name_clip_output)
-            if self.resumable and file.name_clip_output.exists():
+        for c in clip:
+            name = base_name.append_stem(f'_vfr_{len(outputs):03.0f}_{c.fps.numerator}_{c.fps.denominator}')
+            outputs.append(name)
+            if self.resumable and name.exists():
                 continue
-            super().run_enc(c, file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
-            self.params = params
+            segments.append((c, name))
+
+        if min(self.vfr_workers, len(segments)) > 1:
+            self._encode_segments(segments, file, min(self.vfr_workers, len(segments)), qpfile_clip, qpfile_func)
+        else:
+            for c, name in segments:
+                params = self.params.copy()
+                file.name_clip_output = name
+                super().run_enc(c, file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
+                self.params = params
 
         self.tcfile = make_tcfile(clip, file.name_file_final.with_suffix('.tcfile'))
         MatroskaFile(base_name, None, ('--quiet' if self._quiet else ''), '--timestamps', f'0:{self.tcfile.to_str()}').append_to(outputs)
 
         return None
 
+    def _encode_segments(self, segments: Sequence[Tuple[vs.VideoNode, VPath]], file: FileInfo, workers: int,
+                         qpfile_clip: Optional[vs.VideoNode],
+                         qpfile_func: Callable[[vs.VideoNode, AnyPath], Qpfile]) -> None:
+        threads = self.vfr_threads or max(1, self._cpus() // workers)
+        logger.info(f'{workers} segment(s) at once with {threads} thread(s) each')
+
+        p = RenderProgress()
+        encoders = list[SupportManualVFR]()
+        for c, name in segments:
+            enc = copy.copy(self)
+            enc.file = copy.copy(file)
+            enc.file.name_clip_output = name
+            enc.params = self.params.copy()
+            if isinstance(enc, VideoLanEncoder):
+                enc._set_threads(threads)
+            # A chunked encode of the segment shares these threads between its chunks
+            enc._cpu_share = threads
+            if '--no-progress' not in enc.params:
+                enc.params.append('--no-progress')
+            enc.progress_update = partial(_chunk_progress, p, p.add_task(f'Segment {name.stem}', total=c.num_frames))
+            encoders.append(enc)
+
+        def _run(enc: SupportManualVFR, c: vs.VideoNode) -> None:
+            super(SupportManualVFR, enc).run_enc(c, enc.file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
+
+        p.start()
+        try:
+            with ThreadPoolExecutor(workers) as executor:
+                for future in [executor.submit(_run, enc, c) for enc, (c, _) in zip(encoders, segments)]:
+                    future.result()
+        finally:
+            p.stop()
+
+
+class SupportChunked(SupportQpfile, ABC):
+    # pylint: disable=arguments-differ
+    chunks: int = 0
+    """
+    Number of segments the clip is split into at scene changes.\n
+    The segments are encoded by several encoder processes at once then joined.
+    ``0`` or ``1`` disables the chunked mode.
+    """
+
+    chunk_workers: int = 0
+    """Number of encoder processes running at once. Defaults to :py:attr:`chunks`"""
+
+    spool: Optional[AnyPath] = None
+    """
+    Shared directory where the chunks are handed over to :py:func:`vardautomation.tooling.spool.spool_worker`
+    processes, possibly on other hosts, instead of being encoded locally.
+    """
+
+    spool_script: Optional[AnyPath] = None
+    """VapourSynth script run by the spool workers to get the clip. Defaults to the running script"""
+
+    spool_output: int = 0
+    """Output index of the clip in :py:attr:`spool_script`"""
+
+    _threads_param: ClassVar[str]
+
+    @overload
+    def run_enc(self, clip: vs.VideoNode, file: FileInfo) -> None:
+        ...
+
+    @overload
+    def run_enc(self, clip: vs.VideoNode, file: None) -> None:
+        ...
+
+    @overload
+    def run_enc(self, clip: vs.VideoNode, file: FileInfo, *,
+                qpfile_clip: vs.VideoNode,
+                qpfile_func: Callable[[vs.VideoNode, AnyPath], Qpfile] = ...) -> None:
+        ...
+
+    @overload
+    def run_enc(self, clip: vs.VideoNode, file: None, *,
+                qpfile_clip: None = ...,
+                qpfile_func: Callable[[vs.VideoNode, AnyPath], Qpfile] = ...) -> None:
+        ...
+
+    @logger.catch
+    def run_enc(self, clip: vs.VideoNode, file: FileInfo | None, *,  # noqa C901
+                qpfile_clip: 'vs.VideoNode | None' = None,
+                qpfile_func: Callable[[vs.VideoNode, AnyPath], Qpfile] = make_qpfile) -> None:
+        if self.chunks < 2:
+            return super().run_enc(clip, file, **dict(qpfile_clip=qpfile_clip, qpfile_func=qpfile_func))
+
+        logger.info(f'Chunked encode is enabled with {self.chunks} chunks...')
+        if not file:
+            raise ValueError(f'{self.__class__.__name__}: a FileInfo file is needed when enabling chunked encode')
+        if getattr(self, 'resumable', False):
+            logger.warning(f'{self.__class__.__name__}: resumable encode is not supported by chunked encode, ignoring it')
+        self.file = file
+
+        # Scene changes give the split points and, with a qpfile_clip, the keyframes of every chunk
+        qpfile = qpfile_func(qpfile_clip or clip, file.name_clip_output.append_stem('_qpfile').with_suffix('.log'))
+        scenes = qpfile.frames if qpfile.frames is not None else _read_qpfile(qpfile.path)
+        if not qpfile_clip:
+            qpfile.path.rm(ignore_errors=True)
+
+        bounds = _chunk_bounds(clip.num_frames, self.chunks, scenes)
+        workers = min(self.chunk_workers or len(bounds) - 1, len(bounds) - 1)
+        threads = max(1, self._cpus() // workers)
+        spool = Spool(self.spool) if self.spool else None
+
+        encoders = [
+            self._chunk_encoder(
+                clip, i, start, end, None if spool else threads,
+                scenes if qpfile_clip else None, spool.parts if spool else None
+            )
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+        ]
+        if spool:
+            logger.info(f'Chunks start at frames {bounds[:-1]}, handed over to the spool {spool.path.to_str()}')
+            self._encode_chunks_spool(spool, clip, encoders, bounds)
+        else:
+            logger.info(f'Chunks start at frames {bounds[:-1]}, {workers} encoder(s) at once with {threads} thread(s) each')
+            self._encode_chunks_local(encoders, workers)
+
+        outputs = [enc.file.name_clip_output for enc in encoders]
+        _join_chunks(outputs, file.name_clip_output, self._quiet)
+
+        for enc in encoders:
+            enc.file.name_clip_output.rm(ignore_errors=True)
+            if qpfile_clip:
+                enc.file.name_clip_output.append_stem('_qpfile').with_suffix('.log').rm(ignore_errors=True)
+            if spool:
+                spool.remove(enc.file.name_clip_output.stem)
+        if qpfile_clip:
+            qpfile.path.rm(ignore_errors=True)
+        return None
+
+    @staticmethod
+    def _encode_chunks_local(encoders: Sequence['SupportChunked'], workers: int) -> None:
+        p = RenderProgress()
+        tasks = [p.add_task(f'Chunk {i}', total=enc.clip.num_frames) for i, enc in enumerate(encoders)]
+        p.start()
+        try:
+            for enc, task in zip(encoders, tasks):
+                enc.progress_update = partial(_chunk_progress, p, task)
+            with ThreadPoolExecutor(workers) as executor:
+                for future in [executor.submit(enc._do_encode) for enc in encoders]:
+                    future.result()
+        finally:
+            p.stop()
+
+    def _encode_chunks_spool(self, spool: Spool, clip: vs.VideoNode,
+                             encoders: Sequence['SupportChunked'], bounds: Sequence[int]) -> None:
+        script = VPath(self.spool_script or inspect.stack()[-1].filename).resolve()
+        jobs = [
+            SpoolJob(
+                enc.file.name_clip_output.stem, script.to_str(), self.spool_output, clip.num_frames, start, end,
+                enc.params, enc.y4m, enc.file.name_clip_output.to_str(), self._threads_param
+            )
+            for enc, start, end in zip(encoders, bounds[:-1], bounds[1:])
+        ]
+        for job in jobs:
+            spool.remove(job.id)
+            spool.submit(job)
+
+        p = RenderProgress()
+        task = p.add_task('Waiting for the spool workers...', total=clip.num_frames)
+        p.start()
+        try:
+            spool.wait(jobs, on_done=lambda job: p.update(task, advance=job.end - job.start))
+        finally:
+            p.stop()
+
+    def _chunk_encoder(self, clip: vs.VideoNode, i: int, start: int, end: int, threads: Optional[int],
+                       keyframes: Optional[Sequence[int]], outdir: Optional[VPath] = None) -> 'SupportChunked':
+        enc = copy.copy(self)
+        enc.file = copy.copy(self.file)
+        enc.file.name_clip_output = self.file.name_clip_output.append_stem(f'_chunk_{i:03.0f}')
+        if outdir:
+            enc.file.name_clip_output = outdir / enc.file.name_clip_output.name
+        enc.clip = clip[start:end]
+        enc.chunks = 0
+
+        params = self.params_asdict if isinstance(self, HasOverrideParams) else {}
+        enc.params = [p for p in self.params]
+        if '--zones' in params:
+            zones = _remap_zones(str(params['--zones']), start, end)
+            idx = enc.params.index('--zones')
+            if zones:
+                enc.params[idx + 1] = zones
+            else:
+                del enc.params[idx:idx + 2]
+        if isinstance(enc, VideoLanEncoder):
+            enc._set_threads(threads)
+        enc._cpu_share = threads
+        if '--no-progress' not in enc.params:
+            enc.params.append('--no-progress')
+        if keyframes is not None:
+            qpfile = write_qpfile(
+                enc.file.name_clip_output.append_stem('_qpfile').with_suffix('.log'),
+                [f - start for f in keyframes if start <= f < end]
+            )
+            enc.params.extend(['--qpfile', qpfile.path.to_str()])
+
+        enc._update_settings()
+        return enc
+
+
+def _read_qpfile(path: VPath) -> List[int]:
+    with path.open('r', encoding='utf-8') as file:
+        return [int(line.split()[0]) for line in file if line.strip()]
+
+
+def _chunk_bounds(num_frames: int, chunks: int, scenes: Sequence[int]) -> List[int]:
+    # Split at the scene change the closest to every ideal boundary
+    scenes = sorted(s for s in set(scenes) if 0 < s < num_frames)
+    bounds = [0]
+    for i in range(1, chunks):
+        target = round(num_frames * i / chunks)
+        j = bisect.bisect_left(scenes, target)
+        candidates = [scenes[k] for k in (j - 1, j) if 0 <= k < len(scenes)] or [target]
+        split = min(candidates, key=lambda s: abs(s - target))
+        if bounds[-1] < split < num_frames:
+            bounds.append(split)
+    bounds.append(num_frames)
+    return bounds
+
+
+def _remap_zones(zones: str, start: int, end: int) -> str:
+    remapped = list[str]()
+    for zone in zones.split('/'):
+        zstart, zend, *opts = zone.split(',')
+        zstart_i, zend_i = max(int(zstart), start), min(int(zend), end - 1)
+        if zstart_i <= zend_i:
+            remapped.append(','.join([str(zstart_i - start), str(zend_i - start), *opts]))
+    return '/'.join(remapped)
+
+
+def _chunk_progress(p: RenderProgress, task: int, value: int, endvalue: int) -> None:
+    p.update(task, advance=value - p.completed(task))
+
+
+def _join_chunks(chunks: Sequence[VPath], output: VPath, quiet: bool) -> None:
+    logger.info('Chunked encode; joining...')
+    if output.suffix.lower() == '.mkv':
+        MatroskaFile(output, None, ('--quiet' if quiet else '')).append_to(chunks)
+        return
+    # Raw AVC/HEVC bitstreams can be concatenated as every chunk starts with its own parameter sets
+    with output.open('wb') as out:
+        for chunk in chunks:
+            with chunk.open('rb') as file:
+                shutil.copyfileobj(file, out, 1 << 24)
+
 
 class HasOverrideParams(VideoEncoder, ABC):
     @copy_docstring_from(VideoEncoder.__init__, 'o+t')
@@ -582,7 +1272,7 @@ class HasZone(HasOverrideParams, ABC):
         )
 
 
-class VideoLanEncoder(SupportManualVFR, SupportResume, SupportQpfile, HasZone, HasOverrideParams, VideoEncoder, ABC):
+class VideoLanEncoder(SupportManualVFR, SupportChunked, SupportResume, SupportQpfile, HasZone, HasOverrideParams, VideoEncoder, ABC):
     """Abstract VideoEncoder interface for VideoLan based encoders such as x265 and x264."""
 
     resumable: bool
@@ -627,11 +1317,20 @@ class VideoLanEncoder(SupportManualVFR, SupportResume, SupportQpfile, HasZone, H
             min_keyint=round(self.clip.fps), keyint=round(self.clip.fps) * 10
         )
 
+    def _set_threads(self, threads: Optional[int]) -> None:
+        # Replace the number of threads of the command line; None only removes it
+        if self._threads_param in self.params:
+            idx = self.params.index(self._threads_param)
+            del self.params[idx:idx + 2]
+        if threads:
+            self.params.extend([self._threads_param, str(threads)])
+
 
 class X265(VideoLanEncoder):
     """Video encoder using x265 for HEVC"""
 
     _vl_binary = BinaryPath.x265
+    _threads_param = '--pools'
 
     resumable: bool
     """Enable resumable encodes"""
@@ -667,6 +1366,7 @@ class X264(VideoLanEncoder):
     """Video encoder using x264 for AVC"""
 
     _vl_binary = BinaryPath.x264
+    _threads_param = '--threads'
 
     resumable: bool
     """Enable resumable encodes"""